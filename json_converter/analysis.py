@@ -0,0 +1,259 @@
+import cProfile
+import pstats
+import time
+from collections.abc import Mapping
+
+from .data_node import DataNode
+from .json_mapper import KEYWORD_MARKER, SPEC_FILTER, SPEC_OBJECT_LITERAL, SPEC_ARRAY_LITERAL, \
+    SPEC_LOOKUP, JsonMapper, passes_filter
+
+ASSUMED_ARRAY_LENGTH = 10
+
+PATH_LOOKUPS = 'path_lookups'
+COPIES = 'copies'
+MAP_CALLS = 'map_calls'
+NODE_APPLICATIONS = 'node_applications'
+POST_PROCESS_CALLS = 'post_process_calls'
+FILTER_CALLS = 'filter_calls'
+
+WORK_MEASURES = [PATH_LOOKUPS, COPIES, MAP_CALLS, NODE_APPLICATIONS, POST_PROCESS_CALLS, FILTER_CALLS]
+
+
+class SpecUsage:
+    """
+    The estimated work done for a single (nested) specification: how many times it is mapped and applied to a node
+    per document, and the path lookups and post-processor calls made by its own fields.
+    """
+
+    def __init__(self, location, anchor, map_calls, node_applications):
+        self.location = location
+        self.anchor = anchor
+        self.map_calls = map_calls
+        self.node_applications = node_applications
+        self.path_lookups = 0
+        self.post_process_calls = 0
+
+    @property
+    def work(self):
+        return self.path_lookups + self.post_process_calls + self.node_applications
+
+
+class SpecCost:
+    """
+    The estimated work that mapping a document with a specification takes in `JsonMapper`, in terms of path lookups,
+    deep copies, `map` calls, nodes the specification is applied to, and post-processor and filter calls.
+
+    With a sample document, array lengths and filters are taken from the sample; otherwise, every anchor is assumed
+    to be an array of `array_length` items that all pass the filters. When profiled, `measured` has the same measures
+    counted while actually mapping the sample, along with the `seconds` it took and the calls and cumulative time of
+    each post-processor in `post_processors`.
+    """
+
+    def __init__(self):
+        self.path_lookups = 0
+        self.copies = 0
+        self.map_calls = 0
+        self.node_applications = 0
+        self.post_process_calls = 0
+        self.filter_calls = 0
+        self.output_values = 0
+        self.usages = []
+        self.measured = None
+        self.post_processors = None
+
+    def estimates(self) -> dict:
+        return {measure: getattr(self, measure) for measure in WORK_MEASURES}
+
+    def report(self, top=10) -> str:
+        header = f'  {"":<20} {"estimated":>12}'
+        if self.measured:
+            header += f' {"measured":>12}'
+        lines = ['Work per document:', header]
+        for measure, estimate in self.estimates().items():
+            line = f'  {measure:<20} {estimate:>12}'
+            if self.measured:
+                line += f' {self.measured[measure]:>12}'
+            lines.append(line)
+        lines.append(f'  {"output_values":<20} {self.output_values:>12} (at most)')
+        if self.measured:
+            lines.append(f'  {"seconds":<20} {"":>12} {self.measured["seconds"]:>12.6f}')
+        lines.append('Most expensive specifications:')
+        lines.append(f'  {"location":<30} {"anchor":<30} {"maps":>8} {"nodes":>8} {"lookups":>8} {"post":>8}')
+        for usage in sorted(self.usages, key=lambda usage: usage.work, reverse=True)[:top]:
+            lines.append(f'  {usage.location or "<root>":<30} {usage.anchor or "<root>":<30} {usage.map_calls:>8} '
+                         f'{usage.node_applications:>8} {usage.path_lookups:>8} {usage.post_process_calls:>8}')
+        if self.post_processors:
+            lines.append('Post-processors:')
+            for name, (calls, seconds) in sorted(self.post_processors.items(), key=lambda item: -item[1][1]):
+                lines.append(f'  {name:<40} {calls:>8} calls {seconds:>12.6f}s')
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+def analyse_spec(spec, on='', sample: dict = None, array_length=ASSUMED_ARRAY_LENGTH, profile=False) -> SpecCost:
+    """
+    Estimates the work per document of mapping with the specification, without mapping anything unless profiling is
+    requested. Profiling maps the sample document, once to time it and once under the profiler to count the work.
+    """
+    if profile and sample is None:
+        raise ValueError('Profiling requires a sample document.')
+    cost = SpecCost()
+    _SpecWalker(cost, sample, array_length).walk(spec, on)
+    if profile:
+        _profile(cost, spec, on, sample)
+    return cost
+
+
+class _SpecWalker:
+    """
+    Follows the specification the way `JsonMapper` does, multiplying the work of every nested specification by the
+    number of times it is applied.
+    """
+
+    def __init__(self, cost: SpecCost, sample, array_length):
+        self.cost = cost
+        self.sample = None if sample is None else DataNode.view(sample)
+        self.array_length = array_length
+        self.lookup_targets = set()
+
+    def walk(self, spec, on):
+        # the source document is copied when the mapper is created
+        self.cost.copies += 1
+        self.map(spec, on, 1, '')
+        self.cost.path_lookups += len(self.lookup_targets)
+
+    def map(self, spec, on, calls, location, is_output_array=False):
+        JsonMapper._check_if_readable(spec)
+        cost = self.cost
+        anchor = JsonMapper._determine_anchor(on, spec)
+        filter_spec = spec.get(SPEC_FILTER)
+        if is_output_array or not anchor:
+            nodes, passing = 1, 1
+        else:
+            cost.path_lookups += calls
+            nodes, passing = self.anchored_nodes(anchor, filter_spec)
+            # each anchored node is copied
+            cost.copies += calls * nodes
+        usage = SpecUsage(location, anchor, calls, calls * nodes)
+        cost.usages.append(usage)
+        cost.map_calls += calls
+        cost.node_applications += calls * nodes
+        if filter_spec is not None:
+            cost.filter_calls += calls * nodes
+            usage.path_lookups += calls * nodes
+        applications = calls * passing
+        # passing nodes get a new result node, which is copied once it is complete
+        cost.copies += 2 * applications
+        for field_name, field_spec in spec.items():
+            if field_name.startswith(KEYWORD_MARKER):
+                continue
+            JsonMapper._check_if_readable(field_spec)
+            field_location = f'{location}.{field_name}' if location else field_name
+            cost.output_values += applications
+            if isinstance(field_spec, dict):
+                self.map(field_spec, anchor, applications, field_location)
+            else:
+                self.field(field_spec, applications, usage, field_location)
+        cost.path_lookups += usage.path_lookups
+        cost.post_process_calls += usage.post_process_calls
+
+    def field(self, spec, applications, usage, location):
+        source_field_name = spec[0]
+        if source_field_name in (SPEC_OBJECT_LITERAL, SPEC_ARRAY_LITERAL):
+            self.literal(spec, applications, location)
+        elif source_field_name == SPEC_LOOKUP:
+            usage.path_lookups += applications
+            if applications > 0 and len(spec) > 3:
+                self.lookup_targets.add((spec[2], spec[3]))
+        else:
+            usage.path_lookups += applications
+            if len(spec) > 1:
+                usage.post_process_calls += applications
+
+    def literal(self, spec, applications, location):
+        value = spec[1] if len(spec) > 1 else None
+        contains_spec = spec[2] if len(spec) == 3 else False
+        if not contains_spec or not value:
+            return
+        if isinstance(value, Mapping):
+            self.map(value, '', applications, location)
+            return
+        # items of $array literals are applied to the current node, items of $object literals to the root
+        is_output_array = spec[0] == SPEC_ARRAY_LITERAL
+        for index, item in enumerate(value):
+            self.map(item, '', applications, f'{location}[{index}]', is_output_array)
+
+    def anchored_nodes(self, anchor, filter_spec):
+        if self.sample is None:
+            return self.array_length, self.array_length
+        node = self.sample.get(anchor)
+        if node is None:
+            return 0, 0
+        items = node if isinstance(node, list) else [node]
+        passing = sum(1 for item in items if filter_spec is None or passes_filter(filter_spec, item))
+        return len(items), passing
+
+
+def _profile(cost: SpecCost, spec, on, sample):
+    started = time.perf_counter()
+    JsonMapper(sample).map(spec, on=on)
+    seconds = time.perf_counter() - started
+
+    profiler = cProfile.Profile()
+    profiler.runcall(lambda: JsonMapper(sample).map(spec, on=on))
+    stats = pstats.Stats(profiler).stats
+
+    post_processors, predicates = _functions(spec)
+    measured = {measure: 0 for measure in WORK_MEASURES}
+    cost.post_processors = {}
+    for (file_name, line, function_name), (_, calls, _, cumulative, callers) in stats.items():
+        code = (file_name, line, function_name)
+        if function_name == '__getitem__' and file_name.endswith('data_node.py'):
+            measured[PATH_LOOKUPS] += calls
+        elif function_name == '_map' and file_name.endswith('json_mapper.py'):
+            measured[MAP_CALLS] += calls
+        elif function_name == '_apply_node_spec' and file_name.endswith('json_mapper.py'):
+            measured[NODE_APPLICATIONS] += calls
+        elif function_name == 'deepcopy':
+            measured[COPIES] += sum(caller_stats[1] for caller, caller_stats in callers.items()
+                                    if caller[0].endswith('data_node.py'))
+        if code in post_processors:
+            measured[POST_PROCESS_CALLS] += calls
+            cost.post_processors[post_processors[code]] = (calls, cumulative)
+        if code in predicates:
+            measured[FILTER_CALLS] += calls
+    measured['seconds'] = seconds
+    cost.measured = measured
+
+
+def _functions(spec):
+    """
+    Finds the post-processors and filter predicates written in Python in the specification, keyed by their code.
+    """
+    post_processors = {}
+    predicates = {}
+    pending = [spec]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, Mapping):
+            filter_spec = value.get(SPEC_FILTER)
+            if isinstance(filter_spec, list) and len(filter_spec) > 1:
+                _add_function(predicates, filter_spec[1])
+            pending.extend(field_spec for field_name, field_spec in value.items()
+                           if not field_name.startswith(KEYWORD_MARKER))
+        elif isinstance(value, list) and value:
+            if value[0] in (SPEC_OBJECT_LITERAL, SPEC_ARRAY_LITERAL):
+                if len(value) == 3 and value[2]:
+                    pending.extend(value[1] if isinstance(value[1], list) else [value[1]])
+            elif value[0] != SPEC_LOOKUP and len(value) > 1:
+                _add_function(post_processors, value[1])
+    return post_processors, predicates
+
+
+def _add_function(functions, function):
+    code = getattr(function, '__code__', None)
+    if code is not None:
+        functions[(code.co_filename, code.co_firstlineno, code.co_name)] = getattr(function, '__qualname__',
+                                                                                   code.co_name)
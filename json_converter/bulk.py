@@ -0,0 +1,220 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .ndjson import NdjsonReader
+from .spec_cache import UncacheableSpecification, spec_digest
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def convert_shard(input_path, spec, on, start, stop, output_path):
+    """
+    Converts the records of the input NDJSON file in the range [start, stop) and writes the results to the
+    output path as NDJSON. The output is written to a temporary file first, so that it only ever appears complete.
+    """
+    written = 0
+    temp_path = f'{output_path}.tmp'
+    try:
+        with NdjsonReader(input_path, persist_index=False) as reader, open(temp_path, 'w') as output:
+            for result in reader.map(using=spec, on=on, start=start, stop=stop):
+                if result is not None:
+                    output.write(json.dumps(result))
+                    output.write('\n')
+                    written += 1
+        os.replace(temp_path, output_path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return written
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class JobProgress:
+
+    def __init__(self, total_records, total_shards):
+        self.total_records = total_records
+        self.total_shards = total_shards
+        self.completed_records = 0
+        self.completed_shards = 0
+        self.converted_records = 0
+        self.started = time.monotonic()
+
+    def add_shard(self, records, resumed=False):
+        self.completed_shards += 1
+        self.completed_records += records
+        if not resumed:
+            self.converted_records += records
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        """Records converted per second during this run, excluding shards completed by earlier runs."""
+        elapsed = self.elapsed
+        return self.converted_records / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds until the job completes, or `None` while there is nothing to estimate from."""
+        remaining = self.total_records - self.completed_records
+        if remaining <= 0:
+            return 0.0
+        rate = self.rate
+        return remaining / rate if rate > 0 else None
+
+    @property
+    def done(self):
+        return self.completed_shards == self.total_shards
+
+    def __str__(self):
+        eta = 'unknown' if self.eta is None else f'{self.eta:.0f}s'
+        return (f'{self.completed_records}/{self.total_records} records, '
+                f'{self.completed_shards}/{self.total_shards} shards, {self.rate:.1f} records/s, ETA {eta}')
+
+
+class BulkConversion:
+    """
+    Converts an NDJSON file in shards of `shard_size` records using a pool of workers. Every completed shard is
+    recorded in a manifest in the output directory, so that running the same conversion again after a failure
+    resumes by skipping the shards that are already done. The manifest records the input file, along with its size
+    and modification time, and the specification it was written for, and resuming with a different or changed input,
+    a different specification or shard size raises `ManifestMismatch`.
+
+    The specification is identified by its `spec_digest`. Specifications that cannot be digested, for instance, ones
+    using lambdas, need an explicit `job_key` instead, which should change whenever the specification does.
+
+    Work is submitted to the given `executor`, or to a process pool with `workers` processes by default, in which
+    case the specification, including its post-processors, needs to be picklable.
+    """
+
+    def __init__(self, input_path, output_dir, spec, on='', shard_size=100000, executor=None, workers=None,
+                 on_progress=None, job_key=None):
+        if shard_size < 1:
+            raise ValueError('Shard size should be at least 1.')
+        if job_key is None:
+            try:
+                job_key = spec_digest(spec, on)
+            except UncacheableSpecification as error:
+                raise ValueError(f'Specification cannot be identified for resuming, a job key is required. {error}')
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.spec = spec
+        self.on = on
+        self.shard_size = shard_size
+        self.executor = executor
+        self.workers = workers
+        self.on_progress = on_progress
+        self.job_key = job_key
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.output_dir, MANIFEST_FILE)
+
+    def shard_outputs(self) -> list:
+        """Paths of the completed shard outputs, in record order."""
+        manifest = self._read_manifest() or {'completed': {}}
+        return [os.path.join(self.output_dir, shard['output'])
+                for shard in sorted(manifest['completed'].values(), key=lambda shard: shard['start'])]
+
+    def run(self) -> JobProgress:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with NdjsonReader(self.input_path) as reader:
+            total_records = len(reader)
+        starts = range(0, total_records, self.shard_size)
+        width = max(5, len(str(len(starts) - 1)))
+        shards = [(f'shard-{index:0{width}d}', start, min(start + self.shard_size, total_records))
+                  for index, start in enumerate(starts)]
+        manifest = self._load_manifest(total_records)
+        progress = JobProgress(total_records, len(shards))
+        for name, start, stop in shards:
+            if name in manifest['completed']:
+                progress.add_shard(stop - start, resumed=True)
+
+        pending = [shard for shard in shards if shard[0] not in manifest['completed']]
+        if not pending:
+            return progress
+
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.workers)
+        futures = {}
+        try:
+            for name, start, stop in pending:
+                output_path = os.path.join(self.output_dir, f'{name}.ndjson')
+                future = executor.submit(convert_shard, self.input_path, self.spec, self.on, start, stop, output_path)
+                futures[future] = (name, start, stop)
+            for future in as_completed(futures):
+                name, start, stop = futures[future]
+                written = future.result()
+                manifest['completed'][name] = {
+                    'start': start,
+                    'stop': stop,
+                    'output': f'{name}.ndjson',
+                    'written': written
+                }
+                self._write_manifest(manifest)
+                progress.add_shard(stop - start)
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+        return progress
+
+    def _load_manifest(self, total_records):
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {'completed': {}}
+            manifest.update(self._job_identity(total_records))
+            return manifest
+        if any(manifest.get(key) != value for key, value in self._job_identity(total_records).items()):
+            raise ManifestMismatch(self.manifest_path)
+        return manifest
+
+    def _job_identity(self, total_records):
+        # the size and modification time tell a replaced input file apart, even with the same number of records
+        status = os.stat(self.input_path)
+        return {
+            'input': os.path.abspath(self.input_path),
+            'input_size': status.st_size,
+            'input_modified': status.st_mtime_ns,
+            'job_key': self.job_key,
+            'records': total_records,
+            'shard_size': self.shard_size
+        }
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as manifest_file:
+            return json.load(manifest_file)
+
+    def _write_manifest(self, manifest):
+        temp_path = f'{self.manifest_path}.tmp'
+        try:
+            with open(temp_path, 'w') as manifest_file:
+                json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.manifest_path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+
+class ManifestMismatch(Exception):
+
+    def __init__(self, path):
+        super().__init__(f'Checkpoint manifest [{path}] was written for a different input, specification or '
+                         f'shard size.')
+        self.path = path
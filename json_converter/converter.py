@@ -0,0 +1,710 @@
+import copy
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import uuid
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .data_node import FIELD_SEPARATOR, find_value, parse_field_chain, split_field_name
+from .frozen import FrozenDict, freeze
+from .json_mapper import KEYWORD_MARKER, SPEC_ANCHOR, SPEC_FILTER, SPEC_OBJECT_LITERAL, SPEC_ARRAY_LITERAL, \
+    SPEC_LOOKUP, InvalidNode, UnreadableSpecification, build_lookup_index, check_lookup_spec, find_lookup_match
+from .limits import MappingBudget, MappingLimits
+from .post_process import is_pure
+from .schema import OutputSchemaViolation, compile_schema, prefix_violations
+from .tracing import ANCHOR_SPAN, APPLY_SPAN, MAP_SPAN, POST_PROCESS_SPAN, Tracer, function_name, spec_detail, traced
+
+INTERN_MAX_LENGTH = 64
+PARALLEL_CHUNK_SIZE = 10000
+# to be bumped when compiled plans change in a way that their slots do not show, so that stored plans are not reused
+PLAN_FORMAT = 1
+
+_NOT_FOUND = object()
+
+
+class JsonConverter:
+    """
+    A prepared, reusable form of a mapping specification. The specification is validated and compiled once when the
+    converter is created, and the converter itself is never changed afterwards, so a single instance can be shared by
+    any number of threads, each calling `convert` with its own source document.
+
+    The results are the same as `JsonMapper(source).map(spec, on=on)`, except that the source document is not copied.
+    Values taken from the source are put in the result as they are, so the result shares them with the source.
+    Plain `$object` and `$array` literals are frozen when the converter is created, and every result shares the same
+    immutable `FrozenDict` or `FrozenList` instead of getting its own copy.
+
+    With `intern` set, string field values of up to `INTERN_MAX_LENGTH` characters are also interned, which further
+    reduces the memory used by large outputs with repetitive content.
+
+    With a JSON `schema` for the output, the checks for every output field are compiled along with the specification,
+    and values are validated as they are set, instead of in a separate pass over the result. All the violations found
+    are reported together in an `OutputSchemaViolation`. Plain literals are validated once, when the converter is
+    created.
+    """
+
+    def __init__(self, spec, on='', intern=False, schema=None):
+        self.on = on
+        self.intern = intern
+        self._plan = _compile_spec(spec, on, intern=intern)
+        _share_repeated_anchors(self._plan)
+        if schema is not None:
+            self._plan = _bind_checks(self._plan, compile_schema(schema))
+
+    def convert(self, source: dict, limits: MappingLimits = None, tracer: Tracer = None):
+        budget = None if limits is None else MappingBudget(limits)
+        context = _Context(source, budget, tracer)
+        if self._plan.check is None:
+            return self._plan.evaluate(context)
+        context.violations = []
+        result = self._plan.evaluate(context)
+        if result is None:
+            # nothing is converted without the anchored node, but the missing output has to match the schema too
+            self._plan.check.validate_own(result, context.violations)
+        if context.violations:
+            raise OutputSchemaViolation(context.violations, result)
+        return result
+
+    def convert_parallel(self, source: dict, executor=None, chunk_size=PARALLEL_CHUNK_SIZE, workers=None):
+        """
+        Converts a single document whose anchored array is too large to be mapped in one loop, by splitting the
+        array into chunks of `chunk_size` items that are mapped in the given executor, and merging the results in
+        order. Items that are filtered out are left out as in `convert`, and documents that are not anchored on an
+        array of more than `chunk_size` items are simply converted.
+
+        Without an executor, a thread pool is used on free-threaded Python and a process pool otherwise, with
+        `workers` workers, created and shut down for this call. Creating a pool is expensive, so an executor should
+        be passed when converting several documents. With a process pool, the converter, including its
+        post-processors, needs to be picklable, and the chunks are copied to the workers. Nested specifications and
+        lookups that start from the root need the rest of the document too, which is sent without the anchored array,
+        unless they read from it. For a `ProcessPoolExecutor`, given or created, the converter and that document are
+        pickled once per call into a temporary file, which each worker loads once; other executors that run in other
+        processes get them along with every chunk.
+        """
+        if chunk_size < 1:
+            raise ValueError('Chunk size should be at least 1.')
+        plan = self._plan
+        items = find_value(source, plan.anchor_chain) if plan.anchor else None
+        if not isinstance(items, list) or len(items) <= chunk_size:
+            return self.convert(source)
+        root = _worker_root(plan, source)
+        pool = executor or _parallel_executor(workers)
+        state_path = _save_worker_state(plan, root) if isinstance(pool, ProcessPoolExecutor) else None
+        futures = []
+        try:
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                if state_path is not None:
+                    futures.append(pool.submit(_convert_worker_items, state_path, chunk))
+                else:
+                    futures.append(pool.submit(_convert_items, plan, chunk, root))
+            result = []
+            violations = []
+            for future in futures:
+                chunk_result, chunk_violations = future.result()
+                for violation in chunk_violations:
+                    violation.path = (violation.path[0] + len(result),) + violation.path[1:]
+                violations.extend(chunk_violations)
+                result.extend(chunk_result)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            if executor is None:
+                pool.shutdown()
+            if state_path is not None:
+                os.remove(state_path)
+        if plan.check is not None:
+            plan.check.validate_own(result, violations)
+            if violations:
+                raise OutputSchemaViolation(violations, result)
+        return result
+
+    def __call__(self, source: dict):
+        return self.convert(source)
+
+
+def _convert_items(plan, items, root):
+    context = _Context(root)
+    context.violations = []
+    return plan.map_items(context, items), context.violations
+
+
+# the path, plan and root last loaded by a process pool worker of `convert_parallel`
+_worker_state = (None, None, None)
+
+
+def _save_worker_state(plan, root):
+    # workers tell the state of each call apart by its path, so paths are never reused
+    descriptor, path = tempfile.mkstemp(prefix=f'json-converter-{uuid.uuid4().hex}-', suffix='.pickle')
+    try:
+        with os.fdopen(descriptor, 'wb') as state_file:
+            pickle.dump((plan, root), state_file, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _convert_worker_items(state_path, items):
+    global _worker_state
+    if _worker_state[0] != state_path:
+        with open(state_path, 'rb') as state_file:
+            _worker_state = (state_path,) + pickle.load(state_file)
+    _, plan, root = _worker_state
+    return _convert_items(plan, items, root)
+
+
+def _parallel_executor(workers):
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return ProcessPoolExecutor(max_workers=workers) if gil_enabled else ThreadPoolExecutor(max_workers=workers)
+
+
+def _worker_root(plan, source):
+    """
+    The part of the source that the workers need for the nested specifications and lookups that start from the
+    root: nothing if there are none, and the source without the anchored array, unless they read from it.
+    """
+    paths = list(_root_paths(plan))
+    if not paths:
+        return None
+    array_path = _field_prefix(plan.anchor_chain)
+    for path in paths:
+        path = _field_prefix(path)
+        if path[:len(array_path)] == array_path or array_path[:len(path)] == path:
+            return source
+    return _without(source, array_path)
+
+
+def _root_paths(root_plan):
+    """
+    Finds the paths in the source, starting from the root, that the plan reads from other than the anchored array.
+    Reading from the whole root, which plans without an anchor might, is represented by an empty path.
+    """
+    # plans are paired with the path of the node they are applied to, or None when it is an item of an array
+    pending = [(expression, None) for expression in root_plan.expressions]
+    while pending:
+        plan, base = pending.pop()
+        if isinstance(plan, _SpecPlan):
+            if plan.resolve:
+                if plan.anchor:
+                    yield plan.anchor_chain
+                base = None if plan.anchor else ()
+            if base is not None and plan.filter is not None:
+                yield base + plan.filter.field_chain
+            pending.extend((expression, base) for expression in plan.expressions)
+        elif isinstance(plan, _LiteralPlan):
+            pending.extend((item, base) for item in plan.items or ())
+            if plan.spec is not None:
+                pending.append((plan.spec, base))
+        elif isinstance(plan, _LookupPlan):
+            yield parse_field_chain(plan.target)
+            if base is not None:
+                yield base + plan.field_chain
+        elif base is not None:
+            yield base + plan.field_chain
+
+
+def _field_prefix(path):
+    # the leading field names of the path, up to its first index or wildcard
+    for position, step in enumerate(path):
+        if not isinstance(step, str):
+            return path[:position]
+    return path
+
+
+def _without(source, path):
+    if not path:
+        return source
+    copy = dict(source)
+    node = copy
+    for step in path[:-1]:
+        child = node.get(step)
+        if not isinstance(child, Mapping):
+            return source
+        node[step] = node = dict(child)
+    node.pop(path[-1], None)
+    return copy
+
+
+class _Context:
+    __slots__ = ('root', 'budget', 'tracer', 'anchored_nodes', 'lookup_indices', 'violations')
+
+    def __init__(self, root, budget=None, tracer=None):
+        self.root = root
+        self.budget = budget
+        self.tracer = tracer
+        self.anchored_nodes = {}
+        self.lookup_indices = {}
+        self.violations = None
+
+
+class _SpecPlan:
+    """
+    Compiled dictionary-like specification. Plans that resolve their anchor start from the root of the source, like
+    the nested specifications in `JsonMapper`; the others, used for the items of `$array` literals, are applied to
+    the current node.
+
+    Identical field specifications within the same specification are compiled into a single expression, which is
+    evaluated once per node and its value used for all the output fields that refer to it. Anchors that are shared
+    by several specifications are looked up once per document.
+
+    Plans bound to an output schema validate every object they produce against its `node_check`, and the whole
+    output against its `check`. Field values are validated as they are set, with the `field_checks` compiled for
+    each field, except for the values of nested plans, which are validated by those plans. The items of anchored
+    arrays are mapped by the `items_plan`, bound to the checks for the items of the output array instead.
+    """
+    __slots__ = ('anchor', 'anchor_chain', 'resolve', 'filter', 'fields', 'expressions', 'shared_anchor', 'detail',
+                 'check', 'node_check', 'field_checks', 'parent_checks', 'expression_paths', 'items_plan')
+
+    def __init__(self, anchor, resolve, filter, fields, expressions, detail=None):
+        self.anchor = anchor
+        self.anchor_chain = parse_field_chain(anchor) if anchor else None
+        self.resolve = resolve
+        self.filter = filter
+        self.fields = fields
+        self.expressions = expressions
+        self.shared_anchor = False
+        # the detail of tracing spans
+        self.detail = anchor if detail is None else detail
+        self.check = None
+        self.node_check = None
+        self.field_checks = None
+        self.parent_checks = None
+        self.expression_paths = None
+        self.items_plan = None
+
+    def evaluate(self, context, node=None):
+        tracer = context.tracer
+        if tracer is None:
+            return self._evaluate(context, node)
+        with tracer.span(MAP_SPAN, self.detail):
+            return self._evaluate(context, node)
+
+    def _evaluate(self, context, node):
+        budget = context.budget
+        if budget is None:
+            return self.resolve_node(context, node)
+        budget.enter(self.anchor)
+        result = self.resolve_node(context, node)
+        budget.exit()
+        return result
+
+    def resolve_node(self, context, node):
+        tracer = context.tracer
+        apply = self.apply if tracer is None else self.traced_apply
+        if not self.resolve:
+            result = apply(context, node)
+        elif not self.anchor:
+            result = apply(context, context.root)
+        else:
+            if tracer is None:
+                anchored_node = self.find_anchored_node(context)
+            else:
+                anchored_node = traced(tracer, ANCHOR_SPAN, self.anchor, self.find_anchored_node, context)
+            if anchored_node is None:
+                return None
+            if isinstance(anchored_node, Mapping):
+                result = apply(context, anchored_node)
+            elif isinstance(anchored_node, list):
+                if context.budget is not None:
+                    context.budget.check_array(len(anchored_node))
+                result = self.map_items(context, anchored_node)
+            else:
+                raise InvalidNode(self.anchor)
+        if self.check is not None:
+            self.check.validate_own(result, context.violations)
+        return result
+
+    def map_items(self, context, items):
+        result = []
+        if self.check is None:
+            apply = self.apply if context.tracer is None else self.traced_apply
+            for item in items:
+                mapping = apply(context, item)
+                if len(mapping) > 0:
+                    result.append(mapping)
+            return result
+        items_plan = self.items_plan
+        apply = items_plan.apply if context.tracer is None else items_plan.traced_apply
+        violations = context.violations
+        for item in items:
+            start = len(violations)
+            mapping = apply(context, item)
+            # items left out of the result have nothing set, so nothing was validated for them
+            if len(mapping) > 0:
+                items_plan.node_check.validate_own(mapping, violations)
+                if len(violations) > start:
+                    prefix_violations(violations, start, (len(result),))
+                result.append(mapping)
+        return result
+
+    def find_anchored_node(self, context):
+        if not self.shared_anchor:
+            return find_value(context.root, self.anchor_chain)
+        anchored_node = context.anchored_nodes.get(self.anchor, _NOT_FOUND)
+        if anchored_node is _NOT_FOUND:
+            anchored_node = find_value(context.root, self.anchor_chain)
+            context.anchored_nodes[self.anchor] = anchored_node
+        return anchored_node
+
+    def traced_apply(self, context, node):
+        with context.tracer.span(APPLY_SPAN, self.detail):
+            return self.apply(context, node)
+
+    def apply(self, context, node):
+        budget = context.budget
+        if budget is not None:
+            budget.check_time()
+        if self.filter is not None and not self.filter.passes(node):
+            return {}
+        # expressions are evaluated as their first field is set, in the order of the fields, like in `JsonMapper`
+        expressions = self.expressions
+        paths = self.expression_paths
+        values = []
+        result = {}
+        for name_chain, index in self.fields:
+            if index == len(values):
+                if paths is None:
+                    values.append(expressions[index].evaluate(context, node))
+                else:
+                    values.append(self.evaluate_checked(context, node, index))
+            value = values[index]
+            if value is not None:
+                if budget is not None:
+                    budget.add_node()
+                _set_value(result, name_chain, value)
+        if self.node_check is not None:
+            self.validate_fields(context, values, result)
+        return result
+
+    def evaluate_checked(self, context, node, index):
+        path = self.expression_paths[index]
+        if path is None:
+            return self.expressions[index].evaluate(context, node)
+        violations = context.violations
+        start = len(violations)
+        value = self.expressions[index].evaluate(context, node)
+        if len(violations) > start:
+            # violations found by nested plans are relative to their own output
+            prefix_violations(violations, start, path)
+        return value
+
+    def validate_fields(self, context, values, result):
+        violations = context.violations
+        for index, name_chain, check, deep in self.field_checks:
+            value = values[index]
+            if value is None:
+                continue
+            if deep:
+                check.validate(value, violations, name_chain)
+            else:
+                check.validate_own(value, violations, name_chain)
+        for name_chain, check in self.parent_checks:
+            value = find_value(result, name_chain)
+            if value is not None:
+                check.validate_own(value, violations, name_chain)
+
+
+class _FilterPlan:
+    __slots__ = ('field_chain', 'predicate', 'args')
+
+    def __init__(self, spec):
+        if not isinstance(spec, list) or len(spec) < 2:
+            raise UnreadableSpecification(f'The {SPEC_FILTER} spec requires a field and a predicate.')
+        self.field_chain = parse_field_chain(spec[0])
+        self.predicate = spec[1]
+        self.args = tuple(spec[2:])
+
+    def passes(self, node):
+        value = find_value(node, self.field_chain)
+        if value is None:
+            return True
+        return bool(self.predicate(value, *self.args))
+
+
+class _FieldPlan:
+    __slots__ = ('field_chain', 'operation', 'args', 'intern')
+
+    def __init__(self, spec, intern=False):
+        self.field_chain = parse_field_chain(spec[0])
+        self.operation = spec[1] if len(spec) > 1 else None
+        self.args = tuple(spec[2:])
+        self.intern = intern
+
+    def evaluate(self, context, node):
+        value = find_value(node, self.field_chain)
+        if self.operation is not None:
+            tracer = context.tracer
+            if tracer is None:
+                value = self.operation(value, *self.args)
+            else:
+                with tracer.span(POST_PROCESS_SPAN, function_name(self.operation)):
+                    value = self.operation(value, *self.args)
+        if self.intern and type(value) is str and len(value) <= INTERN_MAX_LENGTH:
+            value = sys.intern(value)
+        return value
+
+    def __reduce__(self):
+        # field plans make up most of a pickled converter; a plain tuple loads about twice as fast as slot state
+        return _restore_field_plan, (self.field_chain, self.operation, self.args, self.intern)
+
+
+def _restore_field_plan(field_chain, operation, args, intern):
+    plan = _FieldPlan.__new__(_FieldPlan)
+    plan.field_chain = field_chain
+    plan.operation = operation
+    plan.args = args
+    plan.intern = intern
+    return plan
+
+
+class _LookupPlan:
+    """
+    Compiled `$lookup` join. The target array is indexed by its key once per document, the first time the lookup is
+    evaluated.
+    """
+    __slots__ = ('field_chain', 'target', 'key', 'target_field')
+
+    def __init__(self, spec):
+        check_lookup_spec(spec)
+        self.field_chain = parse_field_chain(spec[1])
+        self.target = spec[2]
+        self.key = spec[3]
+        self.target_field = spec[4] if len(spec) == 5 else None
+
+    def evaluate(self, context, node):
+        index = context.lookup_indices.get((self.target, self.key))
+        if index is None:
+            index = build_lookup_index(find_value(context.root, parse_field_chain(self.target)), self.key)
+            context.lookup_indices[(self.target, self.key)] = index
+        return find_lookup_match(index, find_value(node, self.field_chain), self.target_field)
+
+
+class _LiteralPlan:
+    """
+    Compiled `$object` or `$array` literal. Plain literals are frozen, so that all results can share them; literals
+    containing specs hold the compiled item plans instead.
+    """
+    __slots__ = ('value', 'items', 'spec')
+
+    def __init__(self, value=None, items=None, spec=None):
+        self.value = value
+        self.items = items
+        self.spec = spec
+
+    def evaluate(self, context, node):
+        if self.items is not None and context.violations is not None:
+            return self.evaluate_checked(context, node)
+        if self.items is not None:
+            return [item.evaluate(context, node) for item in self.items]
+        if self.spec is not None:
+            return self.spec.evaluate(context)
+        return self.value
+
+    def evaluate_checked(self, context, node):
+        violations = context.violations
+        values = []
+        for index, item in enumerate(self.items):
+            start = len(violations)
+            values.append(item.evaluate(context, node))
+            if len(violations) > start:
+                prefix_violations(violations, start, (index,))
+        return values
+
+
+_PLAN_CLASSES = (_SpecPlan, _FilterPlan, _FieldPlan, _LookupPlan, _LiteralPlan)
+
+
+def plan_format() -> str:
+    """
+    Identifies the layout of compiled plans, from `PLAN_FORMAT` and the slots of the plan classes, for telling
+    whether a stored converter can still be used.
+    """
+    slots = ';'.join(f'{plan_class.__name__}:{",".join(plan_class.__slots__)}' for plan_class in _PLAN_CLASSES)
+    return f'{PLAN_FORMAT}-{hashlib.sha256(slots.encode()).hexdigest()[:16]}'
+
+
+def _compile_spec(spec, on='', resolve=True, intern=False, location=''):
+    _check_if_readable(spec)
+    if not isinstance(spec, Mapping):
+        raise UnreadableSpecification('A specification should be a dict-like structure.')
+    anchor = on
+    if SPEC_ANCHOR in spec:
+        anchor = f'{on}{FIELD_SEPARATOR}{spec[SPEC_ANCHOR]}' if on else spec[SPEC_ANCHOR]
+    filter_spec = spec.get(SPEC_FILTER)
+    fields = []
+    expressions = []
+    indices = {}
+    for field_name, field_spec in spec.items():
+        if field_name.startswith(KEYWORD_MARKER):
+            continue
+        _check_if_readable(field_spec)
+        if isinstance(field_spec, list):
+            field = _compile_field(field_spec, intern, field_name)
+        else:
+            field = _compile_spec(field_spec, on=anchor, intern=intern)
+        index = len(expressions)
+        if isinstance(field, _FieldPlan):
+            index = indices.setdefault(_expression_key(field_spec), index)
+        if index == len(expressions):
+            expressions.append(field)
+        fields.append((split_field_name(field_name), index))
+    filter_plan = None if filter_spec is None else _FilterPlan(filter_spec)
+    return _SpecPlan(anchor, resolve, filter_plan, tuple(fields), tuple(expressions), spec_detail(anchor, location))
+
+
+def _expression_key(spec):
+    if len(spec) > 1 and not is_pure(spec[1]):
+        # other post-processors may return a different value, or have side effects, every time they are called
+        return object()
+    # argument types are part of the key, so that arguments like 1 and True are not taken to be the same
+    key = (spec[0], spec[1] if len(spec) > 1 else None) + tuple((type(arg), arg) for arg in spec[2:])
+    try:
+        hash(key)
+    except TypeError:
+        # unhashable arguments; the field spec is kept as a separate expression
+        return object()
+    return key
+
+
+def _share_repeated_anchors(root_plan):
+    plans = []
+    pending = [root_plan]
+    while pending:
+        plan = pending.pop()
+        if isinstance(plan, _SpecPlan):
+            if plan.resolve and plan.anchor:
+                plans.append(plan)
+            pending.extend(plan.expressions)
+        elif isinstance(plan, _LiteralPlan):
+            pending.extend(plan.items or ())
+            if plan.spec is not None:
+                pending.append(plan.spec)
+    anchor_counts = Counter(plan.anchor for plan in plans)
+    for plan in plans:
+        plan.shared_anchor = anchor_counts[plan.anchor] > 1
+
+
+def _bind_checks(plan, check, bound=None):
+    """
+    Binds the checks of a compiled output schema to a copy of the plan, and the relevant parts of it to copies of the
+    nested plans. Compiled plans are left unbound, since the same nested plan is bound to different checks when it
+    is part of an object or of an item of an anchored array; each plan is copied once per check, in `bound`.
+    """
+    if bound is None:
+        bound = {}
+    key = (id(plan), id(check))
+    bound_plan = bound.get(key)
+    if bound_plan is None:
+        bound_plan = bound[key] = copy.copy(plan)
+        bound_plan.check = check
+        _bind_node_checks(bound_plan, check, bound)
+        if plan.resolve and plan.anchor:
+            # whether the anchored node is an array is only known when converting
+            bound_plan.items_plan = copy.copy(plan)
+            _bind_node_checks(bound_plan.items_plan, check.item_check(), bound)
+    return bound_plan
+
+
+def _bind_node_checks(plan, node_check, bound):
+    plan.node_check = node_check
+    expressions = list(plan.expressions)
+    field_checks = []
+    parent_checks = {}
+    # only nested plans find violations while being evaluated, which need the path of their field
+    expression_paths = [None] * len(expressions)
+    for name_chain, index in plan.fields:
+        field_check = node_check.field(name_chain)
+        expression = plan.expressions[index]
+        for length in range(1, len(name_chain)):
+            parent_check = node_check.field(name_chain[:length])
+            if parent_check is not None and not parent_check.trivial:
+                parent_checks[name_chain[:length]] = parent_check
+        deep = True
+        if isinstance(expression, _SpecPlan):
+            # nested plans validate their own output
+            expression_paths[index] = name_chain
+            if field_check is not None:
+                expressions[index] = _bind_checks(expression, field_check, bound)
+            field_check = None
+        elif isinstance(expression, _LiteralPlan):
+            expression_paths[index] = name_chain
+            expressions[index], field_check, deep = _bind_literal_checks(expression, field_check, bound)
+        if field_check is not None and not (field_check.checks_nothing if deep else field_check.trivial):
+            field_checks.append((index, name_chain, field_check, deep))
+    plan.expressions = tuple(expressions)
+    plan.field_checks = tuple(field_checks)
+    plan.parent_checks = tuple(parent_checks.items())
+    plan.expression_paths = tuple(expression_paths) if any(expression_paths) else None
+
+
+def _bind_literal_checks(literal, check, bound):
+    if check is None:
+        return literal, None, False
+    if literal.items is not None:
+        if check.items is None:
+            return literal, check, False
+        bound_literal = copy.copy(literal)
+        bound_literal.items = tuple(_bind_checks(item, check.items, bound) for item in literal.items)
+        return bound_literal, check, False
+    if literal.spec is not None:
+        bound_literal = copy.copy(literal)
+        bound_literal.spec = _bind_checks(literal.spec, check, bound)
+        return bound_literal, None, False
+    # plain literals are the same for every result, so they only need to be validated again if they are invalid
+    violations = []
+    if literal.value is not None:
+        check.validate(literal.value, violations)
+    return (literal, check, True) if violations else (literal, None, False)
+
+
+def _compile_field(spec, intern, field_name=''):
+    source_field_name = spec[0]
+    if source_field_name == SPEC_OBJECT_LITERAL:
+        return _compile_literal(spec, False, intern, field_name)
+    if source_field_name == SPEC_ARRAY_LITERAL:
+        return _compile_literal(spec, True, intern, field_name)
+    if source_field_name == SPEC_LOOKUP:
+        return _LookupPlan(spec)
+    return _FieldPlan(spec, intern)
+
+
+def _compile_literal(spec, is_output_array, intern, field_name=''):
+    if len(spec) < 2 or len(spec) > 3:
+        raise UnreadableSpecification(f'The {spec[0]} spec can  either have 1 or 2 parameters.')
+    value = spec[1]
+    if not isinstance(value, (Mapping, list)):
+        raise UnreadableSpecification('JSON literal should be a dict-like or list structure.')
+    contains_spec = spec[2] if len(spec) == 3 else False
+    if len(value) == 0:
+        return _LiteralPlan()
+    if contains_spec and isinstance(value, list):
+        # items of $array literals are applied to the current node, items of $object literals to the root
+        return _LiteralPlan(items=tuple(_compile_spec(item, resolve=not is_output_array, intern=intern,
+                                                      location=f'{field_name}[{index}]')
+                                        for index, item in enumerate(value)))
+    if contains_spec:
+        return _LiteralPlan(spec=_compile_spec(value, intern=intern, location=field_name))
+    return _LiteralPlan(value=freeze(value))
+
+
+def _check_if_readable(spec):
+    if not (isinstance(spec, (list, dict)) and len(spec) > 0):
+        raise UnreadableSpecification
+
+
+def _set_value(result, name_chain, value):
+    target = result
+    for field in name_chain[:-1]:
+        if field not in target:
+            target[field] = {}
+        elif isinstance(target[field], FrozenDict):
+            # a shared literal is only copied when a field is set inside it
+            target[field] = dict(target[field])
+        target = target[field]
+    target[name_chain[-1]] = value
@@ -1,6 +1,98 @@
 import copy
+import re
+from functools import lru_cache
+
+from .frozen import FrozenDict
 
 FIELD_SEPARATOR = '.'
+WILDCARD = '*'
+
+
+class _EveryItem:
+    """The wildcard step of parsed field chains, kept a single instance through pickling."""
+
+    def __reduce__(self):
+        return '_EVERY_ITEM'
+
+    def __repr__(self):
+        return f'[{WILDCARD}]'
+
+
+_EVERY_ITEM = _EveryItem()
+
+_INDEXED_FIELD = re.compile(r'^(?P<field>[^\[\]]*)(?P<indices>(?:\[(?:-?\d+|\*)\])+)$')
+_INDEX = re.compile(r'\[(-?\d+|\*)\]')
+
+
+@lru_cache(maxsize=1024)
+def parse_field_chain(key: str) -> tuple:
+    """
+    Splits a field chain like `items[0].id` or `items[*].title` into the steps used to walk a JSON
+    document. Field names are kept as strings, indices become ints and wildcards become a marker step.
+    Field names that do not follow the index syntax are kept as they are.
+    """
+    steps = []
+    for field in key.split(FIELD_SEPARATOR):
+        match = _INDEXED_FIELD.match(field) if '[' in field else None
+        if match is None:
+            steps.append(field)
+            continue
+        if match.group('field'):
+            steps.append(match.group('field'))
+        for index in _INDEX.findall(match.group('indices')):
+            steps.append(_EVERY_ITEM if index == WILDCARD else int(index))
+    return tuple(steps)
+
+
+@lru_cache(maxsize=1024)
+def split_field_name(key: str) -> tuple:
+    """
+    Splits an output field name into its chain of keys. The result is cached, so that the same key objects are used
+    for every document written with the same field name.
+    """
+    return tuple(key.split(FIELD_SEPARATOR))
+
+
+def find_value(data, field_chain: tuple, start=0):
+    """
+    Walks the data following the parsed field chain. Wildcard steps collect the values found for the
+    rest of the chain in each item of the list; missing values are left out, and nested wildcards
+    result in a flat list.
+    """
+    current_node = data
+    for position in range(start, len(field_chain)):
+        if current_node is None:
+            return None
+        step = field_chain[position]
+        if step is _EVERY_ITEM:
+            return _find_all(current_node, field_chain, position + 1)
+        elif isinstance(step, int):
+            current_node = _find_item(current_node, step)
+        else:
+            current_node = current_node.get(step)
+    return current_node
+
+
+def _find_item(node, index):
+    if not isinstance(node, list) or not -len(node) <= index < len(node):
+        return None
+    return node[index]
+
+
+def _find_all(node, field_chain, start):
+    if not isinstance(node, list):
+        return None
+    flatten = any(step is _EVERY_ITEM for step in field_chain[start:])
+    values = []
+    for item in node:
+        value = find_value(item, field_chain, start)
+        if value is None:
+            continue
+        if flatten:
+            values.extend(value)
+        else:
+            values.append(value)
+    return values
 
 
 class DataNode:
@@ -8,8 +100,18 @@ class DataNode:
     def __init__(self, defaults={}):
         self.node = copy.deepcopy(defaults)
 
+    @classmethod
+    def view(cls, node):
+        """
+        Creates a DataNode over the given node without copying it. Changes made through the view are made to the
+        original node.
+        """
+        data_node = cls.__new__(cls)
+        data_node.node = node
+        return data_node
+
     def __setitem__(self, key, value):
-        field_chain = key.split(FIELD_SEPARATOR)
+        field_chain = split_field_name(key)
         target_node = self._determine_node(field_chain)
         target_node[field_chain[-1]] = value
 
@@ -18,18 +120,14 @@ class DataNode:
         for field in field_chain[:len(field_chain) - 1]:
             if field not in current_node:
                 current_node[field] = {}
+            elif isinstance(current_node[field], FrozenDict):
+                # a shared literal is only copied when a field is set inside it
+                current_node[field] = dict(current_node[field])
             current_node = current_node[field]
         return current_node
 
     def __getitem__(self, key):
-        field_chain = key.split(FIELD_SEPARATOR)
-        current_node = self.node.get(field_chain[0])
-        for field in field_chain[1:]:
-            if current_node is None:
-                break
-            else:
-                current_node = current_node.get(field)
-        return current_node
+        return find_value(self.node, parse_field_chain(key))
 
     def get(self, key: str, default=None):
         value = self[key]
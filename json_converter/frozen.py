@@ -0,0 +1,66 @@
+class FrozenDict(dict):
+    """
+    An immutable dict, used to share JSON literals between results instead of copying them for each one. Being a
+    dict, it compares equal to, and serialises like, a plain dict. Copying it, shallow or deep, returns the same
+    object; `.copy()` and `thaw` return mutable copies.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is immutable; use thaw() to get a mutable copy.')
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenList(list):
+    """
+    An immutable list, used to share JSON literals between results instead of copying them for each one.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is immutable; use thaw() to get a mutable copy.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+def freeze(value):
+    """
+    Returns an immutable version of a JSON value, with all of its dicts and lists frozen.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """
+    Returns a mutable copy of a JSON value that may contain frozen dicts and lists.
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
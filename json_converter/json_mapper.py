@@ -1,7 +1,11 @@
-import copy
-from collections import Mapping
+from array import array
+from collections.abc import Mapping
 
-from .data_node import DataNode
+from .data_node import DataNode, find_value, parse_field_chain, split_field_name
+from .frozen import freeze
+from .limits import MappingBudget, MappingLimits
+from .schema import OutputSchemaViolation, SchemaCheck, compile_schema, prefix_violations
+from .tracing import ANCHOR_SPAN, APPLY_SPAN, MAP_SPAN, POST_PROCESS_SPAN, Tracer, function_name, spec_detail, traced
 
 KEYWORD_MARKER = '$'
 
@@ -11,47 +15,231 @@ SPEC_FILTER = '$filter'
 SPEC_OBJECT_LITERAL = '$object'
 SPEC_ARRAY_LITERAL = '$array'
 
+SPEC_LOOKUP = '$lookup'
+
+LIST_COLUMNS = 'list'
+ARRAY_COLUMNS = 'array'
+NUMPY_COLUMNS = 'numpy'
+ARROW_COLUMNS = 'arrow'
+
 
 def json_object(value: dict):
-    return [SPEC_OBJECT_LITERAL, value]
+    """
+    Creates an `$object` literal spec. The value is frozen, so that it is shared by all results instead of being
+    copied into each one.
+    """
+    return [SPEC_OBJECT_LITERAL, freeze(value)]
 
 
 def json_array(*values):
-    return [SPEC_ARRAY_LITERAL, list(values)]
+    """
+    Creates an `$array` literal spec. Like in `json_object`, the values are frozen and shared by all results.
+    """
+    return [SPEC_ARRAY_LITERAL, freeze(list(values))]
+
+
+def json_lookup(field: str, target: str, key: str, target_field: str = None):
+    spec = [SPEC_LOOKUP, field, target, key]
+    if target_field is not None:
+        spec.append(target_field)
+    return spec
+
+
+def check_lookup_spec(spec):
+    if len(spec) < 4 or len(spec) > 5 or not all(isinstance(parameter, str) for parameter in spec[1:]):
+        raise UnreadableSpecification(f'The {SPEC_LOOKUP} spec requires a field, a target array, a key, '
+                                      f'and optionally a target field.')
+
+
+def build_lookup_index(items, key: str) -> dict:
+    """
+    Indexes the items of a list by the value of their key field. If several items have the same key, the first one
+    is used.
+    """
+    index = {}
+    if not isinstance(items, list):
+        return index
+    key_chain = parse_field_chain(key)
+    for item in items:
+        if not isinstance(item, Mapping):
+            continue
+        value = find_value(item, key_chain)
+        if value is not None and _is_hashable(value):
+            index.setdefault(value, item)
+    return index
+
+
+def find_lookup_match(index: dict, value, target_field: str = None):
+    """
+    Finds the indexed item matching the value, or the list of items matching each one of a list of values,
+    leaving out values with no match.
+    """
+    if isinstance(value, list):
+        matches = [_lookup_match(index, item, target_field) for item in value]
+        return [match for match in matches if match is not None]
+    return _lookup_match(index, value, target_field)
+
+
+def _lookup_match(index, value, target_field):
+    if value is None or not _is_hashable(value):
+        return None
+    match = index.get(value)
+    if match is not None and target_field is not None:
+        match = find_value(match, parse_field_chain(target_field))
+    return match
+
+
+def _is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def passes_filter(filter_spec: list, source) -> bool:
+    """
+    Checks whether the source JSON passes the `$filter` spec, without copying or mapping it.
+    """
+    return JsonMapper._passes(filter_spec, DataNode.view(source))
 
 
 class JsonMapper:
 
     def __init__(self, source: dict):
         self.root_node = DataNode(source)
-
-    def map(self, using={}, on='', node=None, is_output_array=False):
-        spec = using
-        orig_spec = copy.deepcopy(using)
+        self._lookup_indices = {}
+        # frozen versions of the plain literals of the specifications, by the id of the literal they were made from
+        self._frozen_literals = {}
+        self._budget = None
+        self._tracer = None
+        self._violations = None
+
+    def map(self, using={}, on='', node=None, is_output_array=False, limits: MappingLimits = None,
+            tracer: Tracer = None, schema=None):
+        """
+        Maps the source JSON using the specification. With a JSON `schema`, or one compiled with `compile_schema`
+        for mapping several documents, output values are validated as they are set, and all the violations found
+        are raised together in an `OutputSchemaViolation`.
+        """
+        if limits is None and tracer is None and schema is None:
+            return self._map(using, on, node, is_output_array)
+        self._budget = None if limits is None else MappingBudget(limits)
+        self._tracer = tracer
+        check = schema if schema is None or isinstance(schema, SchemaCheck) else compile_schema(schema)
+        self._violations = None if check is None else []
+        try:
+            result = self._map(using, on, node, is_output_array, check)
+            if result is None and check is not None:
+                # nothing is mapped without the anchored node, but the missing output has to match the schema too
+                check.validate_own(result, self._violations)
+            if self._violations:
+                raise OutputSchemaViolation(self._violations, result)
+            return result
+        finally:
+            self._budget = None
+            self._tracer = None
+            self._violations = None
+
+    def _map(self, spec, on='', node=None, is_output_array=False, check: SchemaCheck = None, location=''):
         self._check_if_readable(spec)
         anchor = self._determine_anchor(on, spec)
-
-        if not is_output_array:
-            node = self.root_node if not anchor else self._anchor_node(anchor)
+        if self._tracer is None:
+            return self._map_anchored(spec, anchor, node, is_output_array, check, None)
+        detail = spec_detail(anchor, location)
+        return traced(self._tracer, MAP_SPAN, detail, self._map_anchored, spec, anchor, node, is_output_array, check,
+                      detail)
+
+    def _map_anchored(self, spec, anchor, node, is_output_array, check, detail):
+        tracer = self._tracer
+        budget = self._budget
+        if budget is not None:
+            budget.enter(anchor)
+
+        if not is_output_array and not anchor:
+            node = self.root_node
+        elif not is_output_array and tracer is None:
+            node = self._anchor_node(anchor)
+        elif not is_output_array:
+            node = traced(tracer, ANCHOR_SPAN, anchor, self._anchor_node, anchor)
 
         if node is None:
+            if budget is not None:
+                budget.exit()
             return node
 
         if isinstance(node, list):
+            if budget is not None:
+                budget.check_array(len(node))
             result = []
+            item_check = None if check is None else check.item_check()
             for item in node:
-                mapping = self._apply_node_spec(item, anchor, spec)
+                start = 0 if check is None else len(self._violations)
+                if tracer is None:
+                    mapping = self._apply_node_spec(item, anchor, spec, item_check)
+                else:
+                    mapping = traced(tracer, APPLY_SPAN, detail, self._apply_node_spec, item, anchor, spec, item_check)
                 if len(mapping) > 0:
+                    if check is not None:
+                        item_check.validate_own(mapping, self._violations)
+                        prefix_violations(self._violations, start, (len(result),))
                     result.append(mapping)
-                spec = copy.deepcopy(orig_spec)
+        elif tracer is None:
+            result = self._apply_node_spec(node, anchor, spec, check)
         else:
-            result = self._apply_node_spec(node, anchor, spec)
+            result = traced(tracer, APPLY_SPAN, detail, self._apply_node_spec, node, anchor, spec, check)
+
+        if check is not None:
+            check.validate_own(result, self._violations)
+
+        if budget is not None:
+            budget.exit()
 
         if is_output_array:
             return result[0] if isinstance(result, list) else result
 
         return result
 
+    def map_columns(self, using={}, on='', column_format=LIST_COLUMNS):
+        """
+        Maps a flat specification, one made up of field specifications only, over the anchored node and returns the
+        result in column-oriented form, a dictionary of the output field names to the list of their values, instead
+        of a list of dictionaries. Items that are filtered out, or for which no field has a value, are left out just
+        like in `map`; missing values of the remaining items are `None`.
+
+        The columns can also be returned as `array` columns for all-numeric fields (`'array'`), NumPy arrays
+        (`'numpy'`), or a PyArrow table (`'arrow'`), if those libraries are installed.
+        """
+        spec = using
+        self._check_if_readable(spec)
+        anchor = self._determine_anchor(on, spec)
+        field_specs = []
+        for field_name, field_spec in spec.items():
+            if not field_name.startswith(KEYWORD_MARKER):
+                if not isinstance(field_spec, list):
+                    raise UnreadableSpecification(f'Columnar output requires field specifications only [{field_name}].')
+                self._check_if_readable(field_spec)
+                field_specs.append((field_name, field_spec))
+
+        node = self.root_node.node if not anchor else self.root_node.get(anchor, None)
+        if node is None:
+            return None
+        if not isinstance(node, (Mapping, list)):
+            raise InvalidNode(anchor)
+
+        filter_spec = spec.get(SPEC_FILTER)
+        columns = {field_name: [] for field_name, _ in field_specs}
+        for item in (node if isinstance(node, list) else [node]):
+            item_node = DataNode.view(item)
+            if not self._passes(filter_spec, item_node):
+                continue
+            values = [self._apply_field_spec(item_node, field_spec) for _, field_spec in field_specs]
+            if all(value is None for value in values):
+                continue
+            for (field_name, _), value in zip(field_specs, values):
+                columns[field_name].append(value)
+        return _format_columns(columns, column_format)
+
     @staticmethod
     def _check_if_readable(spec):
         if not (isinstance(spec, (list, dict)) and len(spec) > 0):
@@ -80,8 +268,11 @@ class JsonMapper:
 
             raise InvalidNode(field)
 
-    def _apply_node_spec(self, node: DataNode, anchor: str, spec: dict):
+    def _apply_node_spec(self, node: DataNode, anchor: str, spec: dict, check: SchemaCheck = None):
         filter_spec = spec.get(SPEC_FILTER)
+        budget = self._budget
+        if budget is not None:
+            budget.check_time()
         if not self._passes(filter_spec, node):
             return {}
         result = DataNode()
@@ -91,13 +282,40 @@ class JsonMapper:
                 self._check_if_readable(field_spec)
                 field_value = None
                 if isinstance(field_spec, list):
-                    field_value = self._apply_field_spec(node, field_spec)
+                    field_value = self._apply_field_spec(node, field_spec, field_name)
+                    if check is not None and field_value is not None:
+                        self._validate_field(check, field_name, field_value)
+                elif isinstance(field_spec, dict) and check is not None:
+                    # nested specifications validate their own output
+                    start = len(self._violations)
+                    field_value = self._map(field_spec, on=anchor, check=check.field(split_field_name(field_name)))
+                    prefix_violations(self._violations, start, split_field_name(field_name))
                 elif isinstance(field_spec, dict):
-                    field_value = self.map(using=field_spec, on=anchor)
+                    field_value = self._map(field_spec, on=anchor)
                 if field_value is not None:
+                    if budget is not None:
+                        budget.add_node()
                     result[field_name] = field_value
+        if check is not None:
+            self._validate_parents(check, spec, result)
         return result.as_dict()
 
+    def _validate_field(self, check: SchemaCheck, field_name, value):
+        name_chain = split_field_name(field_name)
+        field_check = check.field(name_chain)
+        if field_check is not None:
+            field_check.validate(value, self._violations, name_chain)
+
+    def _validate_parents(self, check: SchemaCheck, spec, result: DataNode):
+        parents = dict.fromkeys(split_field_name(field_name)[:length] for field_name in spec
+                                if not field_name.startswith(KEYWORD_MARKER)
+                                for length in range(1, len(split_field_name(field_name))))
+        for name_chain in parents:
+            parent_check = check.field(name_chain)
+            value = find_value(result.node, name_chain)
+            if parent_check is not None and value is not None:
+                parent_check.validate_own(value, self._violations, name_chain)
+
     @staticmethod
     def _passes(filter_spec: list, node: DataNode):
         if filter_spec is None:
@@ -112,12 +330,14 @@ class JsonMapper:
             passing = bool(do_filter(*filter_args))
         return passing
 
-    def _apply_field_spec(self, node: DataNode, spec: list):
+    def _apply_field_spec(self, node: DataNode, spec: list, field_name=''):
         source_field_name = spec[0]
         if source_field_name == SPEC_OBJECT_LITERAL:
-            field_value = self._get_object_or_array_literal(spec)
+            field_value = self._get_object_or_array_literal(spec, field_name=field_name)
         elif source_field_name == SPEC_ARRAY_LITERAL:
-            field_value = self._get_object_or_array_literal(spec, node, True)
+            field_value = self._get_object_or_array_literal(spec, node, True, field_name)
+        elif source_field_name == SPEC_LOOKUP:
+            field_value = self._lookup(node, spec)
         else:
             field_value = node.get(source_field_name)
             has_customisation = len(spec) > 1
@@ -125,10 +345,15 @@ class JsonMapper:
                 operation = spec[1]
                 args = [field_value]
                 args.extend(spec[2:])
-                field_value = operation(*args)
+                tracer = self._tracer
+                if tracer is None:
+                    field_value = operation(*args)
+                else:
+                    with tracer.span(POST_PROCESS_SPAN, function_name(operation)):
+                        field_value = operation(*args)
         return field_value
 
-    def _get_object_or_array_literal(self, spec, node=None, is_output_array=False):
+    def _get_object_or_array_literal(self, spec, node=None, is_output_array=False, field_name=''):
         field_value = self.__get_field_value(spec)
 
         contains_spec = spec[2] if len(spec) == 3 else False
@@ -136,18 +361,41 @@ class JsonMapper:
         if len(field_value) == 0:
             field_value = None
 
+        # the literal belongs to the spec, so mapped items are collected in a new list instead of replacing its items
         if contains_spec and isinstance(field_value, list):
-            for i, item in enumerate(field_value):
-                if node is not None:
-                    field_value[i] = self.map(item, '', node, is_output_array)
-                else:
-                    field_value[i] = self.map(item)
+            if node is not None:
+                field_value = [self._map(item, '', node, is_output_array, location=f'{field_name}[{index}]')
+                               for index, item in enumerate(field_value)]
+            else:
+                field_value = [self._map(item, location=f'{field_name}[{index}]')
+                               for index, item in enumerate(field_value)]
 
         if contains_spec and isinstance(field_value, Mapping):
-            field_value = self.map(field_value)
+            field_value = self._map(field_value, location=field_name)
+
+        if not contains_spec and field_value is not None:
+            # plain literals are shared by all results; being frozen, fields set inside them copy them first
+            field_value = self._freeze_literal(field_value)
 
         return field_value
 
+    def _freeze_literal(self, literal):
+        literal_id = id(literal)
+        frozen = self._frozen_literals.get(literal_id)
+        # the literal is kept along with its frozen version, so that its id cannot be reused by another literal
+        if frozen is None or frozen[0] is not literal:
+            frozen = self._frozen_literals[literal_id] = (literal, freeze(literal))
+        return frozen[1]
+
+    def _lookup(self, node: DataNode, spec: list):
+        check_lookup_spec(spec)
+        target, key = spec[2], spec[3]
+        index = self._lookup_indices.get((target, key))
+        if index is None:
+            index = build_lookup_index(self.root_node.get(target), key)
+            self._lookup_indices[(target, key)] = index
+        return find_lookup_match(index, node.get(spec[1]), spec[4] if len(spec) == 5 else None)
+
     @staticmethod
     def __get_field_value(spec):
         if len(spec) < 2 or len(spec) > 3:
@@ -161,6 +409,37 @@ class JsonMapper:
         return field_value
 
 
+def _format_columns(columns, column_format):
+    if column_format == LIST_COLUMNS:
+        return columns
+    if column_format == ARRAY_COLUMNS:
+        return {name: _as_array(values) for name, values in columns.items()}
+    if column_format == NUMPY_COLUMNS:
+        try:
+            import numpy
+        except ImportError:
+            raise UnsupportedColumnFormat(column_format, 'NumPy is not installed.')
+        return {name: numpy.array(values) for name, values in columns.items()}
+    if column_format == ARROW_COLUMNS:
+        try:
+            import pyarrow
+        except ImportError:
+            raise UnsupportedColumnFormat(column_format, 'PyArrow is not installed.')
+        return pyarrow.table(columns)
+    raise UnsupportedColumnFormat(column_format)
+
+
+def _as_array(values):
+    if values and all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if values and all(type(value) in (int, float) for value in values):
+        return array('d', values)
+    return values
+
+
 class InvalidNode(Exception):
 
     def __init__(self, field):
@@ -172,3 +451,10 @@ class UnreadableSpecification(Exception):
 
     def __init__(self, details=''):
         super().__init__(f'Provided specification is unreadable. {details}')
+
+
+class UnsupportedColumnFormat(Exception):
+
+    def __init__(self, column_format, details=''):
+        super().__init__(f'Column format [{column_format}] is not supported. {details}')
+        self.column_format = column_format
@@ -0,0 +1,83 @@
+import time
+
+MAX_SECONDS = 'max_seconds'
+MAX_NODES = 'max_nodes'
+MAX_ARRAY_LENGTH = 'max_array_length'
+MAX_DEPTH = 'max_depth'
+
+
+class MappingLimits:
+    """
+    Limits on the work done mapping a single document. Any limit left as `None` is not enforced.
+
+    `max_seconds` is the wall time allowed for the whole mapping, `max_nodes` the number of values that can be set
+    in the output, `max_array_length` the number of items in any anchored array, and `max_depth` how deep nested
+    specifications, including those in `$object` and `$array` literals, can be applied. Time is checked before
+    each node is mapped, so a single slow post-processor call is not interrupted.
+    """
+
+    def __init__(self, max_seconds: float = None, max_nodes: int = None, max_array_length: int = None,
+                 max_depth: int = None):
+        self.max_seconds = max_seconds
+        self.max_nodes = max_nodes
+        self.max_array_length = max_array_length
+        self.max_depth = max_depth
+
+
+class MappingBudget:
+    """
+    Tracks the work done during a single mapping call against its limits.
+    """
+
+    def __init__(self, limits: MappingLimits):
+        self.limits = limits
+        self.started = time.monotonic()
+        self.deadline = None if limits.max_seconds is None else self.started + limits.max_seconds
+        self.nodes = 0
+        self.depth = 0
+        # anchors of the specifications being applied, innermost last
+        self.anchors = []
+
+    @property
+    def anchor(self):
+        return self.anchors[-1] if self.anchors else ''
+
+    def enter(self, anchor):
+        self.depth += 1
+        self.anchors.append(anchor)
+        if self.limits.max_depth is not None and self.depth > self.limits.max_depth:
+            self._exceeded(MAX_DEPTH, self.limits.max_depth)
+
+    def exit(self):
+        self.depth -= 1
+        self.anchors.pop()
+
+    def check_array(self, length):
+        if self.limits.max_array_length is not None and length > self.limits.max_array_length:
+            self._exceeded(MAX_ARRAY_LENGTH, self.limits.max_array_length)
+
+    def check_time(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self._exceeded(MAX_SECONDS, self.limits.max_seconds)
+
+    def add_node(self):
+        self.nodes += 1
+        if self.limits.max_nodes is not None and self.nodes > self.limits.max_nodes:
+            self._exceeded(MAX_NODES, self.limits.max_nodes)
+
+    def _exceeded(self, limit, maximum):
+        raise MappingLimitExceeded(limit, maximum, self.anchor, self.nodes, self.depth,
+                                   time.monotonic() - self.started)
+
+
+class MappingLimitExceeded(Exception):
+
+    def __init__(self, limit, maximum, anchor, nodes, depth, elapsed):
+        super().__init__(f'Mapping exceeded {limit} of {maximum} at [{anchor}], after setting {nodes} output nodes '
+                         f'in {elapsed:.3f}s.')
+        self.limit = limit
+        self.maximum = maximum
+        self.anchor = anchor
+        self.nodes = nodes
+        self.depth = depth
+        self.elapsed = elapsed
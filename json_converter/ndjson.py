@@ -0,0 +1,177 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from .json_mapper import SPEC_ANCHOR, SPEC_FILTER, JsonMapper, passes_filter
+
+INDEX_SUFFIX = '.idx'
+
+_INDEX_MAGIC = b'JCNDX001'
+_INDEX_HEADER = struct.Struct('<8sQQ')
+
+
+class NdjsonReader:
+    """
+    Random access reader for newline delimited JSON files. The file is memory-mapped and a record offset index
+    is built on first use and persisted alongside the file (`<path>.idx`), so records can be read by position or
+    range without reading the whole file. Blank lines are not counted as records.
+    """
+
+    def __init__(self, path, index_path=None, persist_index=True):
+        self.path = path
+        self.index_path = index_path or f'{path}{INDEX_SUFFIX}'
+        self.persist_index = persist_index
+        self._file = None
+        self._data = None
+        self._offsets = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        if self._file is not None:
+            return
+        self._file = open(self.path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size > 0 else b''
+        self._offsets = self._load_index(stat)
+        if self._offsets is None:
+            self._offsets = self._build_index()
+            if self.persist_index:
+                self._save_index(stat)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._data = None
+        self._offsets = None
+
+    def __len__(self):
+        self._check_open()
+        return len(self._offsets) - 1
+
+    def record(self, position: int) -> dict:
+        self._check_open()
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError(f'Record [{position}] is out of range.')
+        return json.loads(self._data[self._offsets[position]:self._offsets[position + 1]])
+
+    def records(self, start=0, stop=None):
+        self._check_open()
+        for position in range(*slice(start, stop).indices(len(self))):
+            yield self.record(position)
+
+    def select(self, positions):
+        for position in positions:
+            yield self.record(position)
+
+    def map(self, using={}, on='', start=0, stop=None, positions=None, skip_filtered=False):
+        """
+        Converts the selected records using `JsonMapper`. Records are selected either by a `start`/`stop` range
+        or by an explicit iterable of `positions`.
+
+        If the specification applies a `$filter` to the records themselves, that is, it is not anchored, the filter
+        is checked on each record as soon as it is read, and records that are filtered out are never copied or
+        mapped. They result in the same empty object `JsonMapper` returns, or are left out if `skip_filtered` is set.
+        """
+        JsonMapper._check_if_readable(using)
+        filter_spec = None
+        if not on and isinstance(using, dict) and SPEC_ANCHOR not in using:
+            filter_spec = using.get(SPEC_FILTER)
+        # records reaching the mapper have already passed the filter, so it is not checked again
+        unfiltered_spec = using if filter_spec is None or len(using) == 1 else {
+            field_name: field_spec for field_name, field_spec in using.items() if field_name != SPEC_FILTER
+        }
+        records = self.select(positions) if positions is not None else self.records(start, stop)
+        for record in records:
+            if filter_spec is not None and isinstance(record, dict):
+                if not passes_filter(filter_spec, record):
+                    if not skip_filtered:
+                        yield {}
+                    continue
+                yield JsonMapper(record).map(using=unfiltered_spec)
+            else:
+                yield JsonMapper(record).map(using=using, on=on)
+
+    def partitions(self, count: int) -> list:
+        """
+        Splits the records into at most `count` contiguous ranges of similar size, for distributing work.
+        """
+        self._check_open()
+        total = len(self)
+        count = max(1, min(count, total))
+        size, remainder = divmod(total, count)
+        ranges = []
+        start = 0
+        for partition in range(count):
+            stop = start + size + (1 if partition < remainder else 0)
+            ranges.append(range(start, stop))
+            start = stop
+        return [partition for partition in ranges if len(partition) > 0]
+
+    def _check_open(self):
+        if self._offsets is None:
+            raise ReaderClosed(self.path)
+
+    def _build_index(self):
+        offsets = array('Q')
+        data = self._data
+        size = len(data)
+        start = 0
+        while start < size:
+            end = data.find(b'\n', start)
+            end = size if end == -1 else end + 1
+            if data[start:end].strip():
+                offsets.append(start)
+            start = end
+        offsets.append(size)
+        return offsets
+
+    def _load_index(self, stat):
+        try:
+            with open(self.index_path, 'rb') as index_file:
+                header = index_file.read(_INDEX_HEADER.size)
+                content = index_file.read()
+        except OSError:
+            return None
+        if len(header) != _INDEX_HEADER.size:
+            return None
+        magic, size, modified = _INDEX_HEADER.unpack(header)
+        if magic != _INDEX_MAGIC or size != stat.st_size or modified != stat.st_mtime_ns:
+            return None
+        offsets = array('Q')
+        if len(content) % offsets.itemsize != 0:
+            return None
+        offsets.frombytes(content)
+        return offsets if len(offsets) > 0 else None
+
+    def _save_index(self, stat):
+        temp_path = f'{self.index_path}.tmp'
+        try:
+            with open(temp_path, 'wb') as index_file:
+                index_file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+                index_file.write(self._offsets.tobytes())
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # the index is only a cache; it is rebuilt the next time if it cannot be saved
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class ReaderClosed(Exception):
+
+    def __init__(self, path):
+        super().__init__(f'Reader for [{path}] is not open.')
+        self.path = path
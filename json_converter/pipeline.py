@@ -0,0 +1,63 @@
+import asyncio
+from collections import deque
+from functools import partial
+
+from .converter import JsonConverter
+from .limits import MappingLimits
+
+
+async def convert_stream(documents, converter, executor=None, max_in_flight=16, limits: MappingLimits = None):
+    """
+    Converts a stream of documents, yielding the results in the same order as an async iterator. `documents` can be
+    an async or a plain iterable, and `converter` a `JsonConverter` or a specification to prepare one from.
+
+    Conversion runs in the given executor, or the event loop's default executor, with at most `max_in_flight`
+    documents being converted or waiting to be consumed at any time. When that many are pending, no more documents
+    are read until the oldest result has been consumed, so a slow consumer slows down the source instead of letting
+    results pile up in memory. Results are yielded as soon as they, and all the results before them, are ready, even
+    while the source is waiting for more documents.
+    """
+    if max_in_flight < 1:
+        raise ValueError('At least one document should be allowed in flight.')
+    if not isinstance(converter, JsonConverter):
+        converter = JsonConverter(converter)
+    convert = converter.convert if limits is None else partial(converter.convert, limits=limits)
+    loop = asyncio.get_running_loop()
+    source = _iterate(documents)
+    pending = deque()
+    next_document = None
+    try:
+        while True:
+            if pending and (pending[0].done() or len(pending) >= max_in_flight):
+                yield await pending.popleft()
+                continue
+            if next_document is None:
+                next_document = asyncio.ensure_future(source.__anext__())
+            if pending:
+                # results are yielded as soon as they are ready, rather than when the (slow) source has more
+                await asyncio.wait((pending[0], next_document), return_when=asyncio.FIRST_COMPLETED)
+                if not next_document.done():
+                    continue
+            try:
+                document = await next_document
+            except StopAsyncIteration:
+                next_document = None
+                break
+            next_document = None
+            pending.append(loop.run_in_executor(executor, convert, document))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        if next_document is not None:
+            next_document.cancel()
+        for future in pending:
+            future.cancel()
+
+
+async def _iterate(documents):
+    if hasattr(documents, '__aiter__'):
+        async for document in documents:
+            yield document
+    else:
+        for document in documents:
+            yield document
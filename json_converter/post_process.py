@@ -1,17 +1,183 @@
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+ISO_FORMAT = 'iso'
+# the attribute marking post-processors that always return the same value for the same arguments
+PURE_ATTRIBUTE = 'pure_post_processor'
+ISO_DATE_FORMAT = '%Y-%m-%d'
+
+_DATE_DIRECTIVES = {
+    'Y': r'\d{4}',
+    'y': r'\d{2}',
+    'm': r'\d{1,2}',
+    'd': r'\d{1,2}',
+    'H': r'\d{1,2}',
+    'M': r'\d{1,2}',
+    'S': r'\d{1,2}',
+    'f': r'\d{1,6}',
+    'z': r'Z|[+-]\d{2}:?\d{2}'
+}
+
+_ISO_FRACTION = re.compile(r'(?<=:\d\d)[.,](\d+)')
+_ISO_OFFSET = re.compile(r'(?<=\d)([+-]\d{2})(\d{2})$')
+
+_DATE_TEMPLATES = {
+    'Y': '{0.year:04d}',
+    'm': '{0.month:02d}',
+    'd': '{0.day:02d}',
+    'H': '{0.hour:02d}',
+    'M': '{0.minute:02d}',
+    'S': '{0.second:02d}',
+    'f': '{0.microsecond:06d}'
+}
+
+
+def pure(post_processor):
+    """
+    Marks a post-processor as pure: it has no side effects, and returns the same value, which is not changed
+    afterwards, whenever it is called with the same arguments. `JsonConverter` calls pure post-processors only once
+    for identical field specifications in the same specification, and uses the value for all of their fields.
+    """
+    setattr(post_processor, PURE_ATTRIBUTE, True)
+    return post_processor
+
+
+def is_pure(post_processor) -> bool:
+    return getattr(post_processor, PURE_ATTRIBUTE, False) is True
+
+
+@pure
 def prefix_with(*args):
     data = args[0]
     prefix = args[1]
     return f'{prefix}{data}'
 
 
-# TODO make this an all-purpose date processor
+@pure
 def format_date(*args):
+    """
+    Formats a date string. Given just the date, the date part of an ISO-8601 date-time is returned. Otherwise, the
+    date is parsed, either as ISO-8601 or using the optional input format (in `strptime` syntax), and formatted using
+    the output format (in `strftime` syntax, or `ISO_FORMAT` for ISO-8601). Formats are compiled once and cached.
+
+        'date': ['submission_date', format_date, '%d/%m/%Y', '%Y-%m-%dT%H:%M:%S%z']
+    """
     date = args[0]
     if not date:
         return None
-    return date.split('T')[0]
+    if len(args) == 1:
+        return date.split('T')[0]
+    input_format = args[2] if len(args) > 2 else None
+    parsed = parse_date(date) if input_format is None else _compile_input_format(input_format)(date)
+    return _compile_output_format(args[1])(parsed)
+
+
+def parse_date(date: str) -> datetime:
+    """
+    Parses an ISO-8601 date or date-time, including the `Z` suffix for UTC, fractions of a second of any length, and
+    UTC offsets without a colon.
+    """
+    if date.endswith('Z'):
+        date = f'{date[:-1]}+00:00'
+    # before Python 3.11, fromisoformat only accepts fractions of 3 or 6 digits, and offsets with a colon
+    date = _ISO_FRACTION.sub(_pad_fraction, date)
+    if len(date) > 10:
+        date = _ISO_OFFSET.sub(r'\1:\2', date)
+    return datetime.fromisoformat(date)
+
+
+def _pad_fraction(match):
+    return '.' + match.group(1)[:6].ljust(6, '0')
+
+
+def _split_date_format(date_format):
+    # splits a strftime/strptime format into literal text and directive characters, for example, `%Y-%m` into
+    # [('Y', True), ('-', False), ('m', True)]
+    parts = []
+    position = 0
+    while position < len(date_format):
+        if date_format[position] == '%' and position + 1 < len(date_format):
+            directive = date_format[position + 1]
+            parts.append(('%', False) if directive == '%' else (directive, True))
+            position += 2
+        else:
+            parts.append((date_format[position], False))
+            position += 1
+    return parts
+
+
+@lru_cache(maxsize=64)
+def _compile_input_format(date_format):
+    """
+    Compiles a `strptime` format into a parser. Formats made up of numeric directives only are compiled into a
+    regular expression, which is much faster than `strptime`; any other format falls back to `strptime`.
+    """
+    pattern = []
+    directives = []
+    for part, is_directive in _split_date_format(date_format):
+        if not is_directive:
+            pattern.append(r'\s+' if part.isspace() else re.escape(part))
+        elif part in _DATE_DIRECTIVES and part not in directives:
+            pattern.append(f'({_DATE_DIRECTIVES[part]})')
+            directives.append(part)
+        else:
+            return lambda date: datetime.strptime(date, date_format)
+    regex = re.compile(''.join(pattern))
+
+    def parse(date):
+        match = regex.fullmatch(date)
+        if match is None:
+            raise ValueError(f'Date [{date}] does not match format [{date_format}].')
+        return _build_date(dict(zip(directives, match.groups())))
+    return parse
+
+
+def _build_date(fields):
+    if 'Y' in fields:
+        year = int(fields['Y'])
+    elif 'y' in fields:
+        year = int(fields['y'])
+        year += 1900 if year >= 69 else 2000
+    else:
+        year = 1900
+    zone = fields.get('z')
+    return datetime(year, int(fields.get('m', 1)), int(fields.get('d', 1)), int(fields.get('H', 0)),
+                    int(fields.get('M', 0)), int(fields.get('S', 0)), int(fields.get('f', '0').ljust(6, '0')),
+                    None if zone is None else _parse_time_zone(zone))
+
+
+@lru_cache(maxsize=64)
+def _parse_time_zone(zone):
+    if zone == 'Z':
+        return timezone.utc
+    sign = -1 if zone[0] == '-' else 1
+    zone = zone[1:].replace(':', '')
+    return timezone(sign * timedelta(hours=int(zone[:2]), minutes=int(zone[2:])))
+
+
+@lru_cache(maxsize=64)
+def _compile_output_format(date_format):
+    """
+    Compiles a `strftime` format into a formatter. Formats made up of numeric directives only are compiled into a
+    `str.format` template, which is faster than `strftime`; any other format falls back to `strftime`.
+    """
+    if date_format == ISO_FORMAT:
+        return datetime.isoformat
+    if date_format == ISO_DATE_FORMAT:
+        return lambda date: date.date().isoformat()
+    template = []
+    for part, is_directive in _split_date_format(date_format):
+        if not is_directive:
+            template.append(part.replace('{', '{{').replace('}', '}}'))
+        elif part in _DATE_TEMPLATES:
+            template.append(_DATE_TEMPLATES[part])
+        else:
+            return lambda date: date.strftime(date_format)
+    return ''.join(template).format
 
 
+@pure
 def concatenate_list(*args):
     items = args[0]
     if not items:
@@ -19,6 +185,7 @@ def concatenate_list(*args):
     return ' , '.join(items)
 
 
+@pure
 def default_to(*args):
     value = args[0]
     default_value = args[1]
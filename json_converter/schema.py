@@ -0,0 +1,301 @@
+import re
+from collections.abc import Mapping
+
+# keywords that only describe the data, and do not change whether it is valid
+ANNOTATIONS = {'$schema', '$id', '$comment', 'title', 'description', 'default', 'examples', 'format', 'readOnly',
+               'writeOnly', 'deprecated', 'definitions', '$defs'}
+VALIDATIONS = {'type', 'enum', 'const', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf',
+               'minLength', 'maxLength', 'pattern', 'items', 'minItems', 'maxItems', 'uniqueItems', 'properties',
+               'required', 'additionalProperties', 'minProperties', 'maxProperties'}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_TYPES = {
+    'object': lambda value: isinstance(value, Mapping),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: _is_number(value) and (isinstance(value, int) or value.is_integer()),
+    'number': _is_number,
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None
+}
+_TYPE_CLASSES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+    'null': type(None)
+}
+
+
+def compile_schema(schema) -> 'SchemaCheck':
+    """
+    Compiles a JSON Schema into the checks applied to output values. Only the validation keywords in `VALIDATIONS`
+    are supported, with `items` as a single schema; schemas using any other validation keyword, such as `$ref` or
+    `anyOf`, raise `UnsupportedSchema`, rather than letting invalid output through.
+    """
+    if schema is True or schema is False:
+        check = SchemaCheck(valid=schema)
+        check.prepare()
+        return check
+    if not isinstance(schema, Mapping):
+        raise UnsupportedSchema(f'A schema should be a dict-like structure or a boolean, not [{schema!r}].')
+    unsupported = [keyword for keyword in schema if keyword not in VALIDATIONS and keyword not in ANNOTATIONS]
+    if unsupported:
+        raise UnsupportedSchema(f'Keywords {sorted(unsupported)} are not supported.')
+    check = SchemaCheck()
+    schema_type = schema.get('type')
+    if schema_type is not None:
+        check.types = tuple(schema_type) if isinstance(schema_type, list) else (schema_type,)
+        if any(type_name not in _TYPES for type_name in check.types):
+            raise UnsupportedSchema(f'Unknown type [{schema_type}].')
+    if 'enum' in schema:
+        check.enum = tuple(schema['enum'])
+    if 'const' in schema:
+        check.enum = (schema['const'],)
+    check.bounds = tuple((keyword, schema[keyword]) for keyword in _BOUNDS if keyword in schema)
+    check.lengths = (schema.get('minLength'), schema.get('maxLength'))
+    if 'pattern' in schema:
+        check.pattern = re.compile(schema['pattern'])
+    if 'items' in schema:
+        if not isinstance(schema['items'], (Mapping, bool)):
+            raise UnsupportedSchema('Only a single schema is supported for items.')
+        check.items = compile_schema(schema['items'])
+    check.item_counts = (schema.get('minItems'), schema.get('maxItems'))
+    check.unique_items = schema.get('uniqueItems', False)
+    check.properties = {name: compile_schema(property_schema)
+                        for name, property_schema in schema.get('properties', {}).items()}
+    check.required = tuple(schema.get('required', ()))
+    if 'additionalProperties' in schema:
+        check.additional = compile_schema(schema['additionalProperties'])
+    check.property_counts = (schema.get('minProperties'), schema.get('maxProperties'))
+    check.prepare()
+    return check
+
+
+class SchemaCheck:
+    """
+    A compiled JSON Schema. `validate_own` checks a value against the keywords of this schema only, without looking
+    into the items or properties of arrays and objects, which are checked by their own `SchemaCheck` as they are set
+    during mapping; `validate` checks the whole value.
+    """
+    __slots__ = ('valid', 'types', 'enum', 'bounds', 'lengths', 'pattern', 'items', 'item_counts', 'unique_items',
+                 'properties', 'required', 'additional', 'property_counts', 'type_classes', 'validators', 'trivial')
+
+    def __init__(self, valid=True):
+        self.valid = valid
+        self.types = None
+        self.enum = None
+        self.bounds = ()
+        self.lengths = (None, None)
+        self.pattern = None
+        self.items = None
+        self.item_counts = (None, None)
+        self.unique_items = False
+        self.properties = {}
+        self.required = ()
+        self.additional = None
+        self.property_counts = (None, None)
+        self.type_classes = None
+        self.validators = {}
+        self.trivial = False
+
+    def prepare(self):
+        """
+        Works out which checks apply to each type of value, so that values are only run through the checks that the
+        schema actually has.
+        """
+        validators = {}
+        if self.bounds:
+            validators[int] = validators[float] = SchemaCheck._validate_number
+        if self.lengths != (None, None) or self.pattern is not None:
+            validators[str] = SchemaCheck._validate_string
+        if self.item_counts != (None, None) or self.unique_items:
+            validators[list] = SchemaCheck._validate_array
+        if self.required or self.property_counts != (None, None):
+            validators[dict] = SchemaCheck._validate_object
+        self.validators = validators
+        if self.types is not None:
+            self.type_classes = tuple(_flatten(_TYPE_CLASSES[type_name] for type_name in self.types))
+        self.trivial = self.valid and self.types is None and self.enum is None and not validators
+
+    @property
+    def checks_nothing(self):
+        """Whether any value is valid, including everything inside it."""
+        return self.trivial and self.items is None and not self.properties and self.additional is None
+
+    def item_check(self) -> 'SchemaCheck':
+        """
+        The check for each object produced by a specification mapped over an array: the item schema, or one that
+        accepts anything if there is none, since the keywords of this schema apply to the whole output array.
+        """
+        return _ANYTHING if self.items is None else self.items
+
+    def field(self, name_chain) -> 'SchemaCheck':
+        """The check for the value of a (chained) output field, or `None` if the schema says nothing about it."""
+        check = self
+        for name in name_chain:
+            check = check.properties.get(name, check.additional)
+            if check is None:
+                return None
+        return check
+
+    def validate(self, value, violations: list, path=()):
+        self.validate_own(value, violations, path)
+        if self.items is not None and isinstance(value, list):
+            for index, item in enumerate(value):
+                self.items.validate(item, violations, path + (index,))
+        elif (self.properties or self.additional is not None) and isinstance(value, Mapping):
+            for name, property_value in value.items():
+                check = self.properties.get(name, self.additional)
+                if check is not None:
+                    check.validate(property_value, violations, path + (name,))
+
+    def validate_own(self, value, violations: list, path=()):
+        if self.trivial:
+            return
+        if not self.valid:
+            violations.append(SchemaViolation(path, f'{value!r} is not allowed here.'))
+            return
+        if self.types is not None and not self._has_type(value):
+            expected = self.types[0] if len(self.types) == 1 else list(self.types)
+            violations.append(SchemaViolation(path, f'{value!r} is not of type {expected!r}.'))
+            return
+        if self.enum is not None and not any(_json_equal(value, allowed) for allowed in self.enum):
+            violations.append(SchemaViolation(path, f'{value!r} is not one of {list(self.enum)!r}.'))
+        if self.validators:
+            validator = self.validators.get(type(value)) or self.validators.get(_base_type(value))
+            if validator is not None:
+                validator(self, value, violations, path)
+
+    def _has_type(self, value):
+        if isinstance(value, self.type_classes):
+            # booleans are ints in Python, but not integers in JSON
+            return type(value) is not bool or 'boolean' in self.types
+        # the exact check also accepts integral floats as integers and any dict-like structure as an object
+        return any(_TYPES[type_name](value) for type_name in self.types)
+
+    def _validate_number(self, value, violations, path):
+        for keyword, limit in self.bounds:
+            if not _BOUNDS[keyword][0](value, limit):
+                violations.append(SchemaViolation(path, f'{value!r} {_BOUNDS[keyword][1]} {limit!r}.'))
+
+    def _validate_string(self, value, violations, path):
+        min_length, max_length = self.lengths
+        if min_length is not None and len(value) < min_length:
+            violations.append(SchemaViolation(path, f'{value!r} is shorter than {min_length} characters.'))
+        if max_length is not None and len(value) > max_length:
+            violations.append(SchemaViolation(path, f'{value!r} is longer than {max_length} characters.'))
+        if self.pattern is not None and self.pattern.search(value) is None:
+            violations.append(SchemaViolation(path, f'{value!r} does not match {self.pattern.pattern!r}.'))
+
+    def _validate_array(self, value, violations, path):
+        min_items, max_items = self.item_counts
+        if min_items is not None and len(value) < min_items:
+            violations.append(SchemaViolation(path, f'Array has fewer than {min_items} items.'))
+        if max_items is not None and len(value) > max_items:
+            violations.append(SchemaViolation(path, f'Array has more than {max_items} items.'))
+        if self.unique_items and any(_json_equal(item, other) for index, item in enumerate(value)
+                                     for other in value[index + 1:]):
+            violations.append(SchemaViolation(path, 'Array has non-unique items.'))
+
+    def _validate_object(self, value, violations, path):
+        for name in self.required:
+            if name not in value:
+                violations.append(SchemaViolation(path, f'{name!r} is a required property.'))
+        min_properties, max_properties = self.property_counts
+        if min_properties is not None and len(value) < min_properties:
+            violations.append(SchemaViolation(path, f'Object has fewer than {min_properties} properties.'))
+        if max_properties is not None and len(value) > max_properties:
+            violations.append(SchemaViolation(path, f'Object has more than {max_properties} properties.'))
+
+
+# the check of the items of arrays whose schema has no `items`
+_ANYTHING = SchemaCheck()
+_ANYTHING.prepare()
+
+_BOUNDS = {
+    'minimum': (lambda value, limit: value >= limit, 'is less than the minimum of'),
+    'maximum': (lambda value, limit: value <= limit, 'is greater than the maximum of'),
+    'exclusiveMinimum': (lambda value, limit: value > limit, 'is less than or equal to the exclusive minimum of'),
+    'exclusiveMaximum': (lambda value, limit: value < limit, 'is greater than or equal to the exclusive maximum of'),
+    'multipleOf': (lambda value, limit: (value / limit).is_integer(), 'is not a multiple of')
+}
+
+
+def _base_type(value):
+    if isinstance(value, bool):
+        return bool
+    for base_type in (int, float, str, list, dict):
+        if isinstance(value, base_type):
+            return base_type
+    return dict if isinstance(value, Mapping) else None
+
+
+def _flatten(classes):
+    for type_class in classes:
+        if isinstance(type_class, tuple):
+            yield from type_class
+        else:
+            yield type_class
+
+
+def _json_equal(value, other):
+    # unlike in Python, booleans are not numbers in JSON
+    if isinstance(value, bool) or isinstance(other, bool):
+        return type(value) is type(other) and value == other
+    if isinstance(value, list) and isinstance(other, list):
+        return len(value) == len(other) and all(_json_equal(item, other_item) for item, other_item in zip(value, other))
+    if isinstance(value, Mapping) and isinstance(other, Mapping):
+        return value.keys() == other.keys() and all(_json_equal(value[key], other[key]) for key in value)
+    return value == other
+
+
+def prefix_violations(violations: list, start: int, prefix: tuple):
+    """Prefixes the path of the violations found since `start` with the path they were found at."""
+    for violation in violations[start:]:
+        violation.path = prefix + violation.path
+
+
+class SchemaViolation:
+
+    def __init__(self, path: tuple, message: str):
+        self.path = path
+        self.message = message
+
+    @property
+    def location(self):
+        """The path of the violating value in JSON path-like form, for example, `[2].profile.id`."""
+        location = ''
+        for step in self.path:
+            location += f'[{step}]' if isinstance(step, int) else f'.{step}' if location else step
+        return location
+
+    def __eq__(self, other):
+        return isinstance(other, SchemaViolation) and (self.path, self.message) == (other.path, other.message)
+
+    def __repr__(self):
+        return f'SchemaViolation({self.path!r}, {self.message!r})'
+
+    def __str__(self):
+        return f'{self.location or "<root>"}: {self.message}'
+
+
+class OutputSchemaViolation(Exception):
+
+    def __init__(self, violations: list, result):
+        details = '\n'.join(str(violation) for violation in violations)
+        super().__init__(f'Output does not match the schema, {len(violations)} violation(s):\n{details}')
+        self.violations = violations
+        self.result = result
+
+
+class UnsupportedSchema(Exception):
+
+    def __init__(self, details=''):
+        super().__init__(f'Provided schema is not supported. {details}')
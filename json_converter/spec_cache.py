@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import pickle
+from collections.abc import Mapping
+
+from .converter import JsonConverter, plan_format
+
+try:
+    from importlib import metadata
+except ImportError:
+    # Python 3.7
+    try:
+        import importlib_metadata as metadata
+    except ImportError:
+        metadata = None
+
+# the version of the cache keys
+CACHE_VERSION = 2
+CACHE_EXTENSION = '.pickle'
+# fixed, rather than the highest protocol available, so that digests do not change with the Python version
+DIGEST_PROTOCOL = 4
+
+_LOAD_ERRORS = (OSError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError,
+                pickle.UnpicklingError)
+
+
+def entry_version() -> str:
+    """
+    The version written into every cache entry, made up of the library version and the `plan_format` of converters.
+    Entries written with any other version are prepared again and replaced, instead of being loaded.
+    """
+    return f'{_library_version()}/{plan_format()}'
+
+
+def _library_version():
+    if metadata is not None:
+        try:
+            return metadata.version('json-converter')
+        except metadata.PackageNotFoundError:
+            pass
+    else:
+        try:
+            import pkg_resources
+        except ImportError:
+            pkg_resources = None
+        if pkg_resources is not None:
+            try:
+                return pkg_resources.get_distribution('json-converter').version
+            except pkg_resources.DistributionNotFound:
+                pass
+    # running from a source tree; the plan format still tells incompatible entries apart
+    return 'unknown'
+
+
+def spec_digest(spec, on='', intern=False) -> str:
+    """
+    Returns a content hash of the specification, along with the converter options, which is the same in every
+    process. The specification is hashed in a canonical JSON form, in which post-processors are referenced by their
+    import path and set members are sorted, so specifications using lambdas, nested functions, or other values that
+    cannot be referenced or pickled raise `UncacheableSpecification`.
+    """
+    content = json.dumps([CACHE_VERSION, on, intern, _canonical(spec)], separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _canonical(value):
+    # containers are tagged with their type, so that, for example, lists and tuples of the same items differ
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Mapping):
+        return ['dict', [[_canonical(key), _canonical(item)] for key, item in value.items()]]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [_canonical(item) for item in value]]
+    if isinstance(value, (set, frozenset)):
+        # the iteration order of sets depends on the hash seed of the process
+        members = sorted(json.dumps(_canonical(item), separators=(',', ':')) for item in value)
+        return [type(value).__name__, members]
+    if callable(value) and hasattr(value, '__qualname__'):
+        return ['callable', _import_path(value)]
+    try:
+        content = pickle.dumps(value, protocol=DIGEST_PROTOCOL)
+    except (pickle.PicklingError, AttributeError, TypeError) as error:
+        raise UncacheableSpecification(str(error))
+    return ['pickle', f'{type(value).__module__}.{type(value).__qualname__}', content.hex()]
+
+
+def _import_path(function):
+    qualified_name = function.__qualname__
+    module = getattr(function, '__module__', None)
+    if module is None and hasattr(function, '__objclass__'):
+        # methods of built-in types, like str.upper
+        module = function.__objclass__.__module__
+    if module is None or '<' in qualified_name:
+        raise UncacheableSpecification(f'[{qualified_name}] cannot be imported.')
+    return f'{module}:{qualified_name}'
+
+
+class SpecCache:
+    """
+    A persistent cache of prepared specifications, so that short-lived processes do not pay for preparing large
+    specifications every time they start. Converters are stored in the cache directory, in files named after the
+    `spec_digest` of their specification, and are loaded from there when the same specification is requested again.
+
+    Specifications that cannot be hashed are prepared without being cached. Every cache file starts with the
+    `entry_version` it was written with, and files written by another version of the library or its plans, as well
+    as files that cannot be loaded, are prepared again and replaced. Failing to write a cache file, for instance, to a
+    read-only directory, leaves the converter uncached. The files are pickles, so the cache directory should only be
+    writable by trusted users.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.version = entry_version()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, digest):
+        return os.path.join(self.directory, f'{digest}{CACHE_EXTENSION}')
+
+    def converter(self, spec, on='', intern=False) -> JsonConverter:
+        try:
+            digest = spec_digest(spec, on, intern)
+        except UncacheableSpecification:
+            self.misses += 1
+            return JsonConverter(spec, on, intern)
+        converter = self._load(self.path(digest))
+        if converter is not None:
+            self.hits += 1
+            return converter
+        self.misses += 1
+        converter = JsonConverter(spec, on, intern)
+        self._save(self.path(digest), converter)
+        return converter
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(CACHE_EXTENSION):
+                os.remove(os.path.join(self.directory, file_name))
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as cache_file:
+                # the version comes first, so that plans of another layout are never loaded
+                if pickle.load(cache_file) != self.version:
+                    return None
+                converter = pickle.load(cache_file)
+        except _LOAD_ERRORS:
+            return None
+        return converter if isinstance(converter, JsonConverter) else None
+
+    def _save(self, path, converter):
+        # several workers may prepare the same specification at once; each writes its own file before replacing
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as cache_file:
+                pickle.dump(self.version, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(converter, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except (OSError, pickle.PicklingError, AttributeError, TypeError):
+            # the converter is still usable, it is just not cached
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class UncacheableSpecification(Exception):
+
+    def __init__(self, details=''):
+        super().__init__(f'Specification cannot be cached. {details}')
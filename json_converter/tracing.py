@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+MAP_SPAN = 'map'
+APPLY_SPAN = 'apply'
+ANCHOR_SPAN = 'anchor'
+POST_PROCESS_SPAN = 'post_process'
+
+
+class Span:
+    """
+    A timed section of a mapping, such as applying a specification to a node. Times are in seconds since the tracer
+    was created. Spans are nested: the `parent` of a span is the one that was open in the same thread when it started.
+    """
+    __slots__ = ('tracer', 'name', 'detail', 'parent', 'thread', 'start', 'end', 'children_time')
+
+    def __init__(self, tracer, name, detail=''):
+        self.tracer = tracer
+        self.name = name
+        self.detail = detail
+        self.parent = None
+        self.thread = None
+        self.start = None
+        self.end = None
+        self.children_time = 0.0
+
+    @property
+    def label(self):
+        return f'{self.name} [{self.detail}]' if self.detail else self.name
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def self_time(self):
+        """Time spent in this span, excluding the time spent in its child spans."""
+        return self.duration - self.children_time
+
+    @property
+    def stack(self):
+        """The labels of this span and all of its parents, outermost first."""
+        labels = []
+        span = self
+        while span is not None:
+            labels.append(span.label)
+            span = span.parent
+        labels.reverse()
+        return labels
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        self.thread = threading.get_ident()
+        stack.append(self)
+        self.start = time.perf_counter() - self.tracer.origin
+        return self
+
+    def __exit__(self, *exc_info):
+        self.end = time.perf_counter() - self.tracer.origin
+        self.tracer._stack().pop()
+        if self.parent is not None:
+            self.parent.children_time += self.duration
+        self.tracer.spans.append(self)
+        return False
+
+
+class Tracer:
+    """
+    Collects the spans of one or more mappings, for finding out where the time went in a slow conversion. Spans are
+    recorded around every specification being mapped (`map`), every node it is applied to (`apply`), anchor
+    resolution (`anchor`), and post-processor calls (`post_process`), each with the anchor or function as detail.
+    Specifications in `$object` and `$array` literals also have the output field and item index in their detail.
+
+    The spans can be written out as Chrome trace events, to be opened in `chrome://tracing` or Perfetto, or as folded
+    stacks, the input format of flamegraph tools. A tracer can be shared by several threads; spans are nested per
+    thread. Tracing every node of large documents produces a lot of spans, so it is meant for investigating single
+    conversions rather than to be left on.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    def span(self, name, detail='') -> Span:
+        return Span(self, name, detail)
+
+    def clear(self):
+        self.spans = []
+
+    def chrome_trace(self) -> dict:
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            event = {
+                'name': span.label,
+                'cat': span.name,
+                'ph': 'X',
+                'ts': _microseconds(span.start),
+                'dur': _microseconds(span.duration),
+                'pid': pid,
+                'tid': span.thread
+            }
+            if span.detail:
+                event['args'] = {'detail': span.detail}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def folded_stacks(self) -> dict:
+        """
+        Returns the self time, in microseconds, spent in each distinct stack of spans, keyed by the stack in folded
+        form, the span labels separated by semicolons.
+        """
+        stacks = defaultdict(int)
+        for span in self.spans:
+            stack = ';'.join(label.replace(';', ',') for label in span.stack)
+            stacks[stack] += _microseconds(span.self_time)
+        return dict(stacks)
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+    def write_folded_stacks(self, path):
+        with open(path, 'w') as stacks_file:
+            for stack, microseconds in sorted(self.folded_stacks().items()):
+                stacks_file.write(f'{stack} {microseconds}\n')
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+def traced(tracer: Tracer, name, detail, function, *args):
+    """
+    Calls the function with the given arguments, within a span if there is a tracer.
+    """
+    if tracer is None:
+        return function(*args)
+    with tracer.span(name, detail):
+        return function(*args)
+
+
+def spec_detail(anchor, location=''):
+    """
+    The detail of the spans of a specification: its anchor, preceded by the output field and item index, like
+    `items[1]`, for specifications in `$object` and `$array` literals, which would otherwise be told apart by
+    their anchor only.
+    """
+    if not location:
+        return anchor
+    return f'{location} on {anchor}' if anchor else location
+
+
+def function_name(function):
+    name = getattr(function, '__qualname__', None) or getattr(function, '__name__', None)
+    return name if name is not None else type(function).__name__
+
+
+def _microseconds(seconds):
+    return max(0, round(seconds * 1000000))
@@ -0,0 +1,163 @@
+"""
+Differential testing of mapping engines. Random source documents and specifications are generated from a seed, and
+the results of any engine are compared against those of the reference engine, `JsonMapper.map`, including the
+errors it raises. An engine is any callable taking the source document and the specification.
+"""
+import copy
+import json
+import random
+
+from json_converter.json_mapper import JsonMapper
+from json_converter.post_process import default_to, prefix_with
+
+# 'c' and 'd.e' can be literals that the chained fields below them are then set inside
+OUTPUT_FIELDS = ['a', 'b', 'c', 'c.x', 'c.y', 'd.e', 'd.e.f', 'g']
+SOURCE_FIELDS = ['id', 'name', 'age', 'status', 'tags', 'tags[0]', 'address.city', 'city', 'ref', 'refs', 'missing',
+                 'items[0].name', 'items[*].id', 'items[*].tags[*]', 'profile.name', '']
+ANCHORS = ['profile', 'items', 'profile.address', 'missing', 'items[0]', 'items[*]', 'groups[*].items[*]', 'id']
+NAMES = ['Juan', 'Mary', 'Kamado', 'Peter', '']
+STATUSES = ['valid', 'invalid', 'draft']
+
+
+def identity(*args):
+    return args[0]
+
+
+def stringify(*args):
+    return None if args[0] is None else str(args[0])
+
+
+def count(*args):
+    return len(args[0]) if isinstance(args[0], (list, dict, str)) else None
+
+
+def is_truthy(*args):
+    return bool(args[0])
+
+
+def equals(*args):
+    return args[0] == args[1]
+
+
+def is_positive(*args):
+    return isinstance(args[0], int) and args[0] > 0
+
+
+def reference_engine(source, spec):
+    return JsonMapper(source).map(spec)
+
+
+def run_engine(engine, source, spec):
+    """Runs the engine on copies of the inputs, returning either ('result', value) or ('error', error type)."""
+    try:
+        return 'result', engine(copy.deepcopy(source), copy.deepcopy(spec))
+    except Exception as error:
+        return 'error', type(error)
+
+
+def describe(value):
+    return json.dumps(value, indent=2, sort_keys=True, default=lambda function: f'<{function.__name__}>')
+
+
+def assert_engines_agree(test_case, engine, seed=0, runs=300, reference=reference_engine):
+    generator = random.Random(seed)
+    for run in range(runs):
+        source = generate_source(generator)
+        spec = generate_spec(generator, depth=3)
+        expected = run_engine(reference, source, spec)
+        actual = run_engine(engine, source, spec)
+        if expected != actual:
+            test_case.fail(f'Engines disagree on run {run} with seed {seed}.\n'
+                           f'Source: {describe(source)}\nSpec: {describe(spec)}\n'
+                           f'Expected: {expected}\nActual: {actual}')
+
+
+def generate_source(generator):
+    source = _generate_item(generator)
+    source['profile'] = {
+        'name': _maybe(generator, generator.choice(NAMES)),
+        'city': _maybe(generator, 'Cambridge'),
+        'address': {'city': generator.choice(['Hinxton', 'London'])}
+    }
+    source['items'] = [_generate_item(generator) for _ in range(generator.choice([0, 1, 2, 3, 4, 5, 5, 5]))]
+    source['groups'] = [{'items': [_generate_item(generator) for _ in range(generator.randint(0, 3))]}
+                        for _ in range(generator.randint(0, 2))]
+    return source
+
+
+def _generate_item(generator):
+    item = {
+        'name': generator.choice(NAMES + [None]),
+        'status': generator.choice(STATUSES),
+        'tags': generator.sample(['x', 'y', 'z'], generator.randint(0, 3)),
+        'ref': generator.randint(0, 10),
+        'refs': [generator.randint(0, 10) for _ in range(generator.randint(0, 3))]
+    }
+    # later items of arrays are missing some of the fields of earlier ones
+    if generator.random() < 0.8:
+        item['id'] = generator.randint(-3, 20)
+    if generator.random() < 0.7:
+        item['age'] = generator.randint(1, 80)
+    if generator.random() < 0.3:
+        item['address'] = {'city': generator.choice(['Hinxton', 'London'])}
+    return item
+
+
+def _maybe(generator, value):
+    return value if generator.random() < 0.8 else None
+
+
+def generate_spec(generator, depth):
+    spec = {}
+    if generator.random() < 0.4:
+        spec['$on'] = generator.choice(ANCHORS)
+    if generator.random() < 0.3:
+        spec['$filter'] = _generate_filter(generator)
+    for field_name in generator.sample(OUTPUT_FIELDS, generator.randint(1, 5)):
+        spec[field_name] = _generate_field_spec(generator, depth)
+    return spec
+
+
+def _generate_filter(generator):
+    return generator.choice([
+        [generator.choice(['age', 'name', 'tags']), is_truthy],
+        ['status', equals, generator.choice(STATUSES)],
+        [generator.choice(['id', 'age', 'missing']), is_positive]
+    ])
+
+
+def _generate_field_spec(generator, depth):
+    kind = generator.random()
+    if depth > 0 and kind < 0.15:
+        return generate_spec(generator, depth - 1)
+    if depth > 0 and kind < 0.3:
+        return _generate_literal(generator, depth - 1)
+    if kind < 0.35:
+        return _generate_literal(generator, 0)
+    if kind < 0.4:
+        lookup = ['$lookup', generator.choice(['ref', 'refs', 'id']), 'items', 'id']
+        return lookup + ['name'] if generator.random() < 0.5 else lookup
+    field = generator.choice(SOURCE_FIELDS)
+    return generator.choice([
+        [field],
+        [field],
+        [field, identity],
+        [field, stringify],
+        [field, count],
+        [field, prefix_with, generator.choice(['pre-', 1])],
+        [field, default_to, generator.choice(['default', 0, None])]
+    ])
+
+
+def _generate_literal(generator, depth):
+    if depth > 0 and generator.random() < 0.6:
+        specs = [generate_spec(generator, depth) for _ in range(generator.randint(1, 2))]
+        if generator.random() < 0.5:
+            return ['$array', specs, True]
+        return [generator.choice(['$object', '$array']), specs[0], True]
+    return generator.choice([
+        ['$object', {'schema': 'sample', 'version': generator.randint(1, 3), 'tags': ['a', 'b']}],
+        ['$array', ['list', 'of', {'values': [1, 2]}]],
+        ['$object', {}],
+        ['$array', []]
+    ])
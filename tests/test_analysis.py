@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+from json_converter.analysis import analyse_spec, COPIES, FILTER_CALLS, MAP_CALLS, NODE_APPLICATIONS, \
+    PATH_LOOKUPS, POST_PROCESS_CALLS
+from json_converter.json_mapper import UnreadableSpecification
+from json_converter.post_process import default_to, prefix_with
+
+
+def is_adult(*args):
+    return args[0] >= 18
+
+
+SPEC = {
+    '$on': 'people',
+    '$filter': ['age', is_adult],
+    'name': ['name'],
+    'profile.id': ['id', prefix_with, 'person-'],
+    'sponsor': ['$lookup', 'sponsor_id', 'sponsors', 'id', 'name'],
+    'attributes': ['$array', [
+        {
+            'name': ['', default_to, 'Name'],
+            'value': ['name']
+        }
+    ], True],
+    'registry': ['$object', {
+        '$on': 'registry',
+        'label': ['name']
+    }, True]
+}
+
+SAMPLE = {
+    'registry': {'name': 'registry'},
+    'sponsors': [{'id': 1, 'name': 'sponsor'}],
+    'people': [
+        {'id': 1, 'name': 'Juan', 'age': 30, 'sponsor_id': 1},
+        {'id': 2, 'name': 'Mary', 'age': 12},
+        {'id': 3, 'name': 'Peter', 'age': 40},
+        {'id': 4, 'name': 'Kamado'}
+    ]
+}
+
+
+class AnalyseSpecTest(TestCase):
+
+    def test_static_estimate(self):
+        # when:
+        cost = analyse_spec(SPEC, array_length=5)
+
+        # then:
+        self.assertEqual({
+            # anchors, filter and fields of the 5 people, their attribute, and the registry of each, plus the sponsors
+            PATH_LOOKUPS: 1 + 5 * (1 + 3) + 5 * 2 + 5 * (1 + 5 * 1) + 1,
+            # the source, anchored nodes, and two for every node mapped
+            COPIES: 1 + 5 + 5 * 2 + 5 * 2 + 5 * (5 + 5 * 2),
+            MAP_CALLS: 1 + 5 + 5,
+            NODE_APPLICATIONS: 5 + 5 + 5 * 5,
+            POST_PROCESS_CALLS: 5 + 5,
+            FILTER_CALLS: 5
+        }, cost.estimates())
+        self.assertEqual(['', 'attributes[0]', 'registry'], [usage.location for usage in cost.usages])
+        self.assertEqual(25, cost.usages[2].node_applications)
+
+    def test_estimate_from_sample(self):
+        # when:
+        cost = analyse_spec(SPEC, sample=SAMPLE, profile=True)
+
+        # then:
+        estimates = cost.estimates()
+        # the person without an age passes the filter too
+        self.assertEqual(1 + 3 + 3, estimates[MAP_CALLS])
+        for measure in [PATH_LOOKUPS, COPIES, MAP_CALLS, NODE_APPLICATIONS, POST_PROCESS_CALLS]:
+            with self.subTest(measure=measure):
+                self.assertEqual(cost.measured[measure], estimates[measure])
+        # the filter is not called for the person without an age
+        self.assertEqual(4, estimates[FILTER_CALLS])
+        self.assertEqual(3, cost.measured[FILTER_CALLS])
+        self.assertEqual({'prefix_with', 'default_to'}, set(cost.post_processors))
+        self.assertEqual(3, cost.post_processors['prefix_with'][0])
+        self.assertGreater(cost.measured['seconds'], 0)
+
+    def test_report(self):
+        # given:
+        cost = analyse_spec(SPEC, sample=SAMPLE, profile=True)
+
+        # when:
+        report = cost.report()
+
+        # then:
+        self.assertIn('path_lookups', report)
+        self.assertIn('measured', report)
+        self.assertIn('<root>', report)
+        self.assertIn('prefix_with', report)
+
+    def test_invalid_arguments(self):
+        # expect:
+        with self.assertRaises(ValueError):
+            analyse_spec(SPEC, profile=True)
+        with self.assertRaises(UnreadableSpecification):
+            analyse_spec({'name': 'name'})
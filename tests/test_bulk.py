@@ -0,0 +1,163 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from json_converter.bulk import BulkConversion, ManifestMismatch
+from json_converter.post_process import prefix_with
+
+failing_ids = set()
+
+
+def fail_on_marked(*args):
+    if args[0] in failing_ids:
+        raise RuntimeError(f'failed on {args[0]}')
+    return args[0]
+
+
+class BulkConversionTest(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.input_path = os.path.join(self.directory.name, 'input.ndjson')
+        self.output_dir = os.path.join(self.directory.name, 'output')
+        with open(self.input_path, 'w') as input_file:
+            for index in range(25):
+                input_file.write(json.dumps({'id': index}) + '\n')
+
+    def tearDown(self):
+        failing_ids.clear()
+        self.directory.cleanup()
+
+    def _read_outputs(self, job):
+        results = []
+        for path in job.shard_outputs():
+            with open(path) as output:
+                results.extend(json.loads(line) for line in output)
+        return results
+
+    def test_run(self):
+        # given:
+        reports = []
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            job = BulkConversion(self.input_path, self.output_dir, {'key': ['id', prefix_with, 'r']},
+                                 shard_size=10, executor=executor, on_progress=reports.append)
+
+            # when:
+            progress = job.run()
+
+        # then:
+        self.assertTrue(progress.done)
+        self.assertEqual(25, progress.completed_records)
+        self.assertEqual(3, len(reports))
+        self.assertEqual([{'key': f'r{index}'} for index in range(25)], self._read_outputs(job))
+
+    def test_run_in_process_pool(self):
+        # given:
+        job = BulkConversion(self.input_path, self.output_dir, {'key': ['id', prefix_with, 'p']},
+                             shard_size=7, workers=2)
+
+        # when:
+        progress = job.run()
+
+        # then:
+        self.assertEqual(4, progress.completed_shards)
+        self.assertEqual([{'key': f'p{index}'} for index in range(25)], self._read_outputs(job))
+
+    def test_resume(self):
+        # given:
+        failing_ids.add(15)
+        spec = {'key': ['id', fail_on_marked]}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            job = BulkConversion(self.input_path, self.output_dir, spec, shard_size=10, executor=executor)
+
+            # when:
+            with self.assertRaises(RuntimeError):
+                job.run()
+
+            # then:
+            self.assertEqual([os.path.join(self.output_dir, 'shard-00000.ndjson')], job.shard_outputs())
+            self.assertEqual([], [name for name in os.listdir(self.output_dir) if name.endswith('.tmp')])
+
+            # when:
+            failing_ids.clear()
+            progress = job.run()
+
+        # then:
+        self.assertEqual(10, progress.completed_records - progress.converted_records)
+        self.assertEqual([{'key': index} for index in range(25)], self._read_outputs(job))
+
+    def test_resume_with_different_shard_size(self):
+        # given:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=10, executor=executor).run()
+
+            # expect:
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=5,
+                               executor=executor).run()
+
+    def test_resume_with_different_spec(self):
+        # given:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=10, executor=executor).run()
+
+            # expect:
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(self.input_path, self.output_dir, {'key': ['id', prefix_with, 'r']}, shard_size=10,
+                               executor=executor).run()
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, on='record', shard_size=10,
+                               executor=executor).run()
+
+    def test_resume_with_different_input(self):
+        # given:
+        other_input_path = os.path.join(self.directory.name, 'other.ndjson')
+        with open(self.input_path) as input_file, open(other_input_path, 'w') as other_input:
+            other_input.write(input_file.read())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=10, executor=executor).run()
+
+            # expect:
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(other_input_path, self.output_dir, {'key': ['id']}, shard_size=10,
+                               executor=executor).run()
+
+    def test_resume_with_replaced_input(self):
+        # given:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=10, executor=executor).run()
+            # the same number of records, but different ones
+            with open(self.input_path, 'w') as input_file:
+                for index in range(25):
+                    input_file.write(json.dumps({'id': index + 100}) + '\n')
+            modified = os.stat(self.input_path).st_mtime_ns
+            os.utime(self.input_path, ns=(modified + 1000000000, modified + 1000000000))
+
+            # expect:
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(self.input_path, self.output_dir, {'key': ['id']}, shard_size=10,
+                               executor=executor).run()
+
+    def test_job_key(self):
+        # given:
+        spec = {'key': ['id', lambda *args: args[0] * 2]}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # expect:
+            with self.assertRaises(ValueError):
+                BulkConversion(self.input_path, self.output_dir, spec, executor=executor)
+
+            # when:
+            BulkConversion(self.input_path, self.output_dir, spec, shard_size=10, executor=executor,
+                           job_key='double-v1').run()
+            job = BulkConversion(self.input_path, self.output_dir, spec, shard_size=10, executor=executor,
+                                 job_key='double-v1')
+            progress = job.run()
+
+            # then:
+            self.assertEqual(0, progress.converted_records)
+            self.assertEqual([{'key': index * 2} for index in range(25)], self._read_outputs(job))
+            with self.assertRaises(ManifestMismatch):
+                BulkConversion(self.input_path, self.output_dir, spec, shard_size=10, executor=executor,
+                               job_key='double-v2').run()
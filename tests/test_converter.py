@@ -0,0 +1,447 @@
+import copy
+import json
+import os
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import TestCase
+
+from json_converter.converter import JsonConverter
+from json_converter.json_mapper import JsonMapper, InvalidNode, UnreadableSpecification
+from json_converter.post_process import default_to, prefix_with, pure
+
+
+def is_adult(*args):
+    return args[0] >= 18
+
+
+PEOPLE_SPEC = {
+    '$on': 'people',
+    '$filter': ['age', is_adult],
+    'name': ['name'],
+    'profile.id': ['id', prefix_with, 'person-'],
+    'profile.city': ['address.city'],
+    'metadata': ['$object', {'source': 'registry', 'tags': ['a', 'b']}],
+    'attributes': ['$array', [
+        {
+            'name': ['', default_to, 'Name'],
+            'value': ['name']
+        },
+        {
+            '$on': 'registry',
+            'name': ['', default_to, 'Registry'],
+            'value': ['name'],
+            'registry': {
+                'label': ['name']
+            }
+        }
+    ], True]
+}
+
+
+def people_document(index):
+    return {
+        'registry': {'name': f'registry {index}'},
+        'people': [
+            {'id': index, 'name': f'person {index}', 'age': 18 + index % 3, 'address': {'city': 'Hinxton'}},
+            {'id': index + 1, 'name': f'child {index}', 'age': 10},
+            {'id': index + 2, 'name': f'unknown {index}'}
+        ]
+    }
+
+
+class JsonConverterTest(TestCase):
+
+    def test_convert_matches_json_mapper(self):
+        # given:
+        document = people_document(7)
+        converter = JsonConverter(PEOPLE_SPEC)
+
+        # expect:
+        self.assertEqual(JsonMapper(document).map(PEOPLE_SPEC), converter.convert(document))
+
+    def test_convert_with_on(self):
+        # given:
+        document = {'shop': {'products': [{'name': 'eggs'}, {'name': 'milk'}]}}
+        spec = {'$on': 'products', 'item': ['name']}
+
+        # expect:
+        self.assertEqual([{'item': 'eggs'}, {'item': 'milk'}], JsonConverter(spec, on='shop').convert(document))
+
+    def test_convert_does_not_change_spec(self):
+        # given:
+        spec = copy.deepcopy(PEOPLE_SPEC)
+        converter = JsonConverter(spec)
+
+        # when:
+        first = converter.convert(people_document(1))
+        spec['metadata'][1]['tags'].append('changed')
+        second = converter.convert(people_document(1))
+
+        # then:
+        self.assertEqual(first, second)
+        self.assertEqual(['a', 'b'], second[0]['metadata']['tags'])
+
+    def test_json_mapper_does_not_change_spec(self):
+        # given:
+        spec = copy.deepcopy(PEOPLE_SPEC)
+
+        # when:
+        first = JsonMapper(people_document(3)).map(spec)
+        second = JsonMapper(people_document(3)).map(spec)
+
+        # then:
+        self.assertEqual(first, second)
+        self.assertEqual(PEOPLE_SPEC, spec)
+
+    def test_invalid_spec(self):
+        # expect:
+        with self.assertRaises(UnreadableSpecification):
+            JsonConverter({'field': 'specification'})
+
+        # and:
+        with self.assertRaises(UnreadableSpecification):
+            JsonConverter({'field': ['$object', 'testing!']})
+
+        # and:
+        with self.assertRaises(InvalidNode):
+            JsonConverter({'known_as': ['name']}, on='name').convert({'name': 'Boaty McBoatface'})
+
+    def test_concurrent_use(self):
+        # given:
+        converter = JsonConverter(PEOPLE_SPEC)
+        documents = [people_document(index) for index in range(500)]
+        expected = [json.dumps(JsonMapper(document).map(PEOPLE_SPEC), sort_keys=True) for document in documents]
+
+        # when:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(converter.convert, documents * 4))
+
+        # then:
+        self.assertEqual(expected * 4, [json.dumps(result, sort_keys=True) for result in results])
+
+    def test_convert_with_interning(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'type': ['sample_type'],
+            'label': ['sample_type', prefix_with, 'type:'],
+            'provenance': ['$object', {'schema': 'sample', 'version': '1.0.0', 'authors': ['Jane Doe']}]
+        }
+        source = json.dumps({'samples': [{'sample_type': 'specimen'} for _ in range(1000)]})
+
+        # when:
+        copied = JsonConverter(spec).convert(json.loads(source))
+        interned = JsonConverter(spec, intern=True).convert(json.loads(source))
+
+        # then:
+        self.assertEqual(copied, interned)
+        self.assertIs(interned[0]['label'], interned[-1]['label'])
+        self.assertIsNot(copied[0]['label'], copied[-1]['label'])
+
+    def test_interning_reduces_memory(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'type': ['sample_type', prefix_with, 'type:'],
+            'label': ['label', prefix_with, 'label:'],
+            'state': ['state', prefix_with, 'state:']
+        }
+        samples = [{'sample_type': 'specimen', 'label': 'biomaterial', 'state': 'valid'} for _ in range(2000)]
+        source = json.dumps({'samples': samples})
+
+        # when:
+        copied_size = self._measure(JsonConverter(spec), json.loads(source))
+        interned_size = self._measure(JsonConverter(spec, intern=True), json.loads(source))
+
+        # then:
+        self.assertLess(interned_size, copied_size * 0.6)
+
+    @staticmethod
+    def _measure(converter, source):
+        tracemalloc.start()
+        try:
+            result = converter.convert(source)
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return size
+
+    def test_identical_field_specs_are_evaluated_once(self):
+        # given:
+        calls = []
+
+        @pure
+        def format_date(*args):
+            calls.append(args)
+            return args[0].split('T')[0]
+
+        # and:
+        spec = {
+            '$on': 'submissions',
+            'created': ['submissionDate', format_date],
+            'provenance.submitted': ['submissionDate', format_date],
+            'history.first': ['submissionDate', format_date],
+            'truncated': ['submissionDate', format_date, 1],
+            'flagged': ['submissionDate', format_date, True]
+        }
+        document = {'submissions': [{'submissionDate': '2020-03-05T10:00:00Z'}, {'submissionDate': '2021-01-01T00:00Z'}]}
+
+        expected = JsonMapper(document).map(spec)
+        calls.clear()
+
+        # when:
+        result = JsonConverter(spec).convert(document)
+
+        # then:
+        self.assertEqual(expected, result)
+        self.assertEqual(6, len(calls))
+        self.assertEqual('2020-03-05', result[0]['history']['first'])
+
+    def test_identical_field_specs_with_impure_post_processor(self):
+        # given:
+        def next_number(*args):
+            next_number.count += 1
+            return [next_number.count]
+
+        # and:
+        spec = {
+            '$on': 'items',
+            'first': ['id', next_number],
+            'second': ['id', next_number]
+        }
+        document = {'items': [{'id': 1}, {'id': 2}]}
+
+        # when:
+        next_number.count = 0
+        expected = JsonMapper(document).map(spec)
+        next_number.count = 0
+        result = JsonConverter(spec).convert(document)
+
+        # then:
+        self.assertEqual(expected, result)
+        self.assertEqual([{'first': [1], 'second': [2]}, {'first': [3], 'second': [4]}], result)
+
+    def test_shared_anchors(self):
+        # given:
+        spec = {
+            'profile': {
+                '$on': 'user.profile',
+                'name': ['name']
+            },
+            'contact': {
+                '$on': 'user.profile',
+                'email': ['email']
+            },
+            'settings': {
+                '$on': 'user',
+                'details': {
+                    '$on': 'profile',
+                    'name': ['name']
+                }
+            }
+        }
+        document = {'user': {'profile': {'name': 'Jane Doe', 'email': 'jane@example.org'}}}
+
+        # expect:
+        self.assertEqual(JsonMapper(document).map(spec), JsonConverter(spec).convert(document))
+
+    def test_convert_with_lookup(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'sample': ['id'],
+            'donor': ['$lookup', 'donor_id', 'donors', 'id', 'name'],
+            'donor_age': ['$lookup', 'donor_id', 'donors', 'id', 'age']
+        }
+        document = {
+            'donors': [{'id': index, 'name': f'donor {index}', 'age': index % 90} for index in range(1000)],
+            'samples': [{'id': f'sample {index}', 'donor_id': (index * 7) % 1200} for index in range(1000)]
+        }
+
+        # expect:
+        self.assertEqual(JsonMapper(document).map(spec), JsonConverter(spec).convert(document))
+
+    def test_convert_shares_literals(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'id': ['id'],
+            'provenance': ['$object', {'schema': 'sample', 'authors': [{'name': 'Jane Doe'}]}],
+            'provenance.sample': ['id']
+        }
+        document = {'samples': [{'id': 's1'}, {'id': 's2'}]}
+
+        # when:
+        result = JsonConverter(spec).convert(document)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+        self.assertIs(result[0]['provenance']['authors'], result[1]['provenance']['authors'])
+        with self.assertRaises(TypeError):
+            result[0]['provenance']['authors'].append({'name': 'John Doe'})
+
+    def test_convert_parallel(self):
+        # given:
+        spec = {
+            '$on': 'people',
+            '$filter': ['age', is_adult],
+            'name': ['name'],
+            'profile.id': ['id', prefix_with, 'person-'],
+            'registry': ['$object', {
+                '$on': 'registry',
+                'label': ['name']
+            }, True]
+        }
+        document = {
+            'registry': {'name': 'registry'},
+            'people': [{'id': index, 'name': f'person {index}', 'age': index % 30} for index in range(100)]
+        }
+        converter = JsonConverter(spec)
+
+        # when:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = converter.convert_parallel(document, executor, chunk_size=7)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+        self.assertEqual(['person 18', 'person 19', 'person 20'], [person['name'] for person in result[:3]])
+
+    def test_convert_parallel_in_process_pool(self):
+        # given:
+        spec = {
+            '$on': 'samples[*]',
+            'sample': ['id', prefix_with, 'sample-'],
+            'donor': ['$lookup', 'donor_id', 'donors', 'id', 'name']
+        }
+        document = {
+            'donors': [{'id': index, 'name': f'donor {index}'} for index in range(10)],
+            'samples': [{'id': index, 'donor_id': index % 12} for index in range(25)]
+        }
+
+        # when:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = JsonConverter(spec).convert_parallel(document, executor, chunk_size=10)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+
+    def test_convert_parallel_sends_root_without_array(self):
+        # given:
+        spec = {
+            '$on': 'data.people',
+            'name': ['name'],
+            'registry': ['$object', {'label': ['registry.name']}, True],
+            'team': ['$lookup', 'team_id', 'teams', 'id', 'name']
+        }
+        document = {
+            'registry': {'name': 'registry'},
+            'teams': [{'id': 1, 'name': 'one'}],
+            'data': {'size': 20, 'people': [{'name': f'person {index}', 'team_id': 1} for index in range(20)]}
+        }
+        executor = _RecordingExecutor(max_workers=2)
+
+        # when:
+        with executor:
+            result = JsonConverter(spec).convert_parallel(document, executor, chunk_size=5)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+        roots = [args[2] for args in executor.submitted]
+        self.assertEqual(4, len(roots))
+        self.assertEqual({'registry', 'teams', 'data'}, set(roots[0]))
+        self.assertEqual({'size': 20}, roots[0]['data'])
+        self.assertEqual(20, len(document['data']['people']))
+
+    def test_convert_parallel_sends_root_with_array_read_again(self):
+        # given:
+        spec = {
+            '$on': 'people',
+            'name': ['name'],
+            'partner': ['$lookup', 'partner_id', 'people', 'id', 'name']
+        }
+        document = {'people': [{'id': index, 'name': f'person {index}', 'partner_id': 19 - index}
+                               for index in range(20)]}
+        executor = _RecordingExecutor(max_workers=2)
+
+        # when:
+        with executor:
+            result = JsonConverter(spec).convert_parallel(document, executor, chunk_size=5)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+        self.assertTrue(all(args[2] is document for args in executor.submitted))
+
+    def test_convert_parallel_in_own_process_pool(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'sample': ['id', prefix_with, 'sample-'],
+            'donor': ['$lookup', 'donor_id', 'donors', 'id', 'name']
+        }
+        document = {
+            'donors': [{'id': index, 'name': f'donor {index}'} for index in range(10)],
+            'samples': [{'id': index, 'donor_id': index % 12} for index in range(25)]
+        }
+
+        # when:
+        result = JsonConverter(spec).convert_parallel(document, chunk_size=10, workers=2)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+
+    def test_convert_parallel_in_given_process_pool_sends_state_once(self):
+        # given:
+        spec = {
+            '$on': 'samples',
+            'sample': ['id', prefix_with, 'sample-'],
+            'donor': ['$lookup', 'donor_id', 'donors', 'id', 'name']
+        }
+        document = {
+            'donors': [{'id': index, 'name': f'donor {index}'} for index in range(10)],
+            'samples': [{'id': index, 'donor_id': index % 12} for index in range(25)]
+        }
+        executor = _RecordingProcessPool(max_workers=2)
+
+        # when:
+        with executor:
+            result = JsonConverter(spec).convert_parallel(document, executor, chunk_size=10)
+
+        # then:
+        self.assertEqual(JsonMapper(document).map(spec), result)
+        # only the chunks are sent with each task, along with the path of the converter and document
+        self.assertEqual([10, 10, 5], [len(args[1]) for args in executor.submitted])
+        self.assertEqual(1, len({args[0] for args in executor.submitted}))
+        self.assertFalse(os.path.exists(executor.submitted[0][0]))
+
+    def test_convert_parallel_small_array(self):
+        # given:
+        document = people_document(3)
+        converter = JsonConverter(PEOPLE_SPEC)
+
+        # expect:
+        self.assertEqual(converter.convert(document), converter.convert_parallel(document, chunk_size=3))
+        with self.assertRaises(ValueError):
+            converter.convert_parallel(document, chunk_size=0)
+
+
+class _RecordingExecutor(ThreadPoolExecutor):
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.submitted = []
+
+    def submit(self, function, *args, **kwargs):
+        self.submitted.append(args)
+        return super().submit(function, *args, **kwargs)
+
+
+class _RecordingProcessPool(ProcessPoolExecutor):
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.submitted = []
+
+    def submit(self, function, *args, **kwargs):
+        self.submitted.append(args)
+        return super().submit(function, *args, **kwargs)
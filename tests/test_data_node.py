@@ -74,3 +74,58 @@ class DataNodeTest(TestCase):
         self.assertEqual(default_value, data_node.get('non.existent.field', default_value))
         self.assertEqual('this is a test', data_node.get('content.text', default_value))
         self.assertEqual('', data_node.get('empty'))
+
+    def test___getitem___with_array_index(self):
+        # given:
+        data_node = DataNode({
+            'items': [{'id': 'a1'}, {'id': 'b2'}, {'id': 'c3'}],
+            'matrix': [[1, 2], [3, 4]]
+        })
+
+        # expect:
+        self.assertEqual('a1', data_node['items[0].id'])
+        self.assertEqual('c3', data_node['items[-1].id'])
+        self.assertEqual({'id': 'b2'}, data_node['items[1]'])
+        self.assertEqual(4, data_node['matrix[1][1]'])
+
+        # and: out of range or not a list
+        self.assertIsNone(data_node['items[3].id'])
+        self.assertIsNone(data_node['items[0].id[0]'])
+        self.assertIsNone(data_node['missing[0].id'])
+
+    def test___getitem___with_wildcard(self):
+        # given:
+        data_node = DataNode({
+            'books': [
+                {'title': 'A Python Book', 'tags': ['code', 'python']},
+                {'price': 7.99},
+                {'title': 'Compilation of Fun Stuff', 'tags': ['fun']}
+            ]
+        })
+
+        # expect:
+        self.assertEqual(['A Python Book', 'Compilation of Fun Stuff'], data_node['books[*].title'])
+        self.assertEqual(['code', 'python', 'fun'], data_node['books[*].tags[*]'])
+        self.assertEqual(['python'], data_node['books[*].tags[1]'])
+        self.assertEqual([], data_node['books[*].author'])
+        self.assertIsNone(data_node['magazines[*].title'])
+
+    def test___getitem___keeps_non_index_brackets(self):
+        # given:
+        data_node = DataNode({'weird[key]': 'value', '*': 'star'})
+
+        # expect:
+        self.assertEqual('value', data_node['weird[key]'])
+        self.assertEqual('star', data_node['*'])
+
+    def test_view(self):
+        # given:
+        source = {'product': {'name': 'biscuit'}}
+
+        # when:
+        data_node = DataNode.view(source)
+        data_node['product.id'] = '123'
+
+        # then:
+        self.assertEqual('biscuit', data_node['product.name'])
+        self.assertEqual('123', source['product']['id'])
@@ -0,0 +1,45 @@
+import random
+from unittest import TestCase
+
+from json_converter.converter import JsonConverter
+from tests.differential import assert_engines_agree, generate_source, generate_spec, reference_engine, run_engine
+
+
+class DifferentialTest(TestCase):
+
+    def test_reference_is_deterministic(self):
+        # expect:
+        assert_engines_agree(self, reference_engine, seed=1, runs=100)
+
+    def test_generated_cases_exercise_engine(self):
+        # given:
+        generator = random.Random(2)
+        outcomes = [run_engine(reference_engine, generate_source(generator), generate_spec(generator, depth=3))
+                    for _ in range(300)]
+
+        # expect: the generated cases produce both results and the errors engines have to reproduce
+        results = [value for outcome, value in outcomes if outcome == 'result']
+        self.assertGreater(len(results), 150)
+        self.assertTrue(any(isinstance(result, list) and len(result) > 0 for result in results))
+        self.assertTrue(any(outcome == 'error' for outcome, _ in outcomes))
+
+    def test_converter(self):
+        # expect:
+        for seed in range(5):
+            assert_engines_agree(self, lambda source, spec: JsonConverter(spec).convert(source), seed=seed)
+
+    def test_interning_converter(self):
+        # expect:
+        for seed in range(5, 8):
+            assert_engines_agree(self, lambda source, spec: JsonConverter(spec, intern=True).convert(source),
+                                 seed=seed)
+
+    def test_detects_differences(self):
+        # given:
+        def ignoring_filters(source, spec):
+            spec.pop('$filter', None)
+            return JsonConverter(spec).convert(source)
+
+        # expect:
+        with self.assertRaises(AssertionError):
+            assert_engines_agree(self, ignoring_filters, seed=0)
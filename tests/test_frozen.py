@@ -0,0 +1,56 @@
+import copy
+import json
+import pickle
+from unittest import TestCase
+
+from json_converter.frozen import FrozenDict, FrozenList, freeze, thaw
+
+
+class FrozenTest(TestCase):
+
+    def setUp(self):
+        self.value = {'schema': 'sample', 'authors': [{'name': 'Jane Doe'}], 'version': 1}
+        self.frozen = freeze(self.value)
+
+    def test_freeze(self):
+        # expect:
+        self.assertIsInstance(self.frozen, FrozenDict)
+        self.assertIsInstance(self.frozen['authors'], FrozenList)
+        self.assertIsInstance(self.frozen['authors'][0], FrozenDict)
+        self.assertEqual(self.value, self.frozen)
+        self.assertEqual(json.dumps(self.value), json.dumps(self.frozen))
+        self.assertIs(self.frozen, freeze(self.frozen))
+
+    def test_immutable(self):
+        # given:
+        mutations = [
+            lambda: self.frozen.update({'version': 2}),
+            lambda: self.frozen.setdefault('extra', 1),
+            lambda: self.frozen.pop('schema'),
+            lambda: self.frozen.__setitem__('version', 2),
+            lambda: self.frozen.__delitem__('version'),
+            lambda: self.frozen['authors'].append({}),
+            lambda: self.frozen['authors'].__setitem__(0, {}),
+            lambda: self.frozen['authors'].sort(),
+            lambda: self.frozen['authors'][0].clear()
+        ]
+
+        # expect:
+        for mutation in mutations:
+            with self.assertRaises(TypeError):
+                mutation()
+        self.assertEqual(self.value, self.frozen)
+
+    def test_copies(self):
+        # expect:
+        self.assertIs(self.frozen, copy.copy(self.frozen))
+        self.assertIs(self.frozen, copy.deepcopy(self.frozen))
+        self.assertEqual(self.frozen, pickle.loads(pickle.dumps(self.frozen)))
+        self.assertIsInstance(pickle.loads(pickle.dumps(self.frozen)), FrozenDict)
+
+        # and:
+        thawed = thaw(self.frozen)
+        thawed['authors'].append({'name': 'John Doe'})
+        self.assertIs(type(thawed['authors']), list)
+        self.assertEqual(1, len(self.frozen['authors']))
+        self.assertIs(type(self.frozen.copy()), dict)
@@ -1,8 +1,10 @@
 import json
+from array import array
 from string import Template
 from unittest import TestCase
 
-from json_converter.json_mapper import JsonMapper, InvalidNode, UnreadableSpecification
+from json_converter.json_mapper import JsonMapper, InvalidNode, UnreadableSpecification, UnsupportedColumnFormat, \
+    json_lookup, json_object, json_array
 from json_converter.post_process import default_to
 
 
@@ -271,6 +273,30 @@ class JsonMapperTest(TestCase):
         self.assertIsNotNone(people)
         self.assertEqual(3, len(people))
 
+    def test_map_object_using_array_field_chaining(self):
+        # given:
+        json_object = json.loads('''{
+            "books": [
+                {"title": "A Python Book", "price": 23.75},
+                {"title": "A Novel", "price": 7.99}
+            ]
+        }''')
+
+        # when:
+        catalogue_json = JsonMapper(json_object).map({
+            'titles': ['books[*].title'],
+            'first_price': ['books[0].price'],
+            'cheapest': {
+                '$on': 'books[1]',
+                'title': ['title']
+            }
+        })
+
+        # then:
+        self.assertEqual(['A Python Book', 'A Novel'], catalogue_json.get('titles'))
+        self.assertEqual(23.75, catalogue_json.get('first_price'))
+        self.assertEqual({'title': 'A Novel'}, catalogue_json.get('cheapest'))
+
     # TODO consider required field mode
     def test_map_object_ignore_missing_fields(self):
         # given:
@@ -504,3 +530,154 @@ class JsonMapperTest(TestCase):
         # then:
         self.assertEqual(expected_value, result.get('metadata'))
         self.assertFalse('empty' in result.keys())
+
+    def test_map_columns(self):
+        # given:
+        json_object = json.loads('''{
+            "product_list": [
+                {"name": "eggs", "price": 1.25, "stock": 12},
+                {"name": "milk", "price": 0.50, "stock": 3},
+                {"name": "loaf", "price": 2.25},
+                {"sku": "unnamed"}
+            ]
+        }''')
+
+        # and:
+        def price_filter(*args):
+            return args[0] >= 1
+
+        # when:
+        columns = JsonMapper(json_object).map_columns({
+            '$on': 'product_list',
+            '$filter': ['price', price_filter],
+            'item': ['name'],
+            'cost': ['price'],
+            'stock': ['stock']
+        })
+
+        # then:
+        self.assertEqual({
+            'item': ['eggs', 'loaf'],
+            'cost': [1.25, 2.25],
+            'stock': [12, None]
+        }, columns)
+
+    def test_map_columns_as_arrays(self):
+        # given:
+        json_mapper = JsonMapper({'readings': [{'at': 1, 'value': 0.5}, {'at': 2, 'value': 1}]})
+
+        # when:
+        columns = json_mapper.map_columns({'at': ['at'], 'value': ['value']}, on='readings', column_format='array')
+
+        # then:
+        self.assertEqual(array('q', [1, 2]), columns['at'])
+        self.assertEqual(array('d', [0.5, 1.0]), columns['value'])
+
+    def test_map_columns_with_invalid_spec(self):
+        # given:
+        json_mapper = JsonMapper({'readings': [{'at': 1}]})
+
+        # expect:
+        with self.assertRaises(UnreadableSpecification):
+            json_mapper.map_columns({'$on': 'readings', 'nested': {'at': ['at']}})
+
+        # and:
+        with self.assertRaises(UnsupportedColumnFormat):
+            json_mapper.map_columns({'$on': 'readings', 'at': ['at']}, column_format='parquet')
+
+        # and: missing anchor
+        self.assertIsNone(json_mapper.map_columns({'$on': 'missing', 'at': ['at']}))
+
+    def test_map_with_lookup(self):
+        # given:
+        json_object = json.loads('''{
+            "donors": [
+                {"id": "d1", "name": "Donor One", "sex": "female"},
+                {"id": "d2", "name": "Donor Two", "sex": "male"}
+            ],
+            "samples": [
+                {"id": "s1", "donor_id": "d2", "related": ["d1", "d3", "d2"]},
+                {"id": "s2", "donor_id": "d3"},
+                {"id": "s3", "donor_id": "d1"}
+            ]
+        }''')
+
+        # when:
+        samples = JsonMapper(json_object).map({
+            '$on': 'samples',
+            'sample': ['id'],
+            'donor': json_lookup('donor_id', 'donors', 'id'),
+            'donor_sex': ['$lookup', 'donor_id', 'donors', 'id', 'sex'],
+            'related_donors': json_lookup('related', 'donors', 'id', 'name')
+        })
+
+        # then:
+        self.assertEqual([
+            {
+                'sample': 's1',
+                'donor': {'id': 'd2', 'name': 'Donor Two', 'sex': 'male'},
+                'donor_sex': 'male',
+                'related_donors': ['Donor One', 'Donor Two']
+            },
+            {'sample': 's2'},
+            {
+                'sample': 's3',
+                'donor': {'id': 'd1', 'name': 'Donor One', 'sex': 'female'},
+                'donor_sex': 'female'
+            }
+        ], samples)
+
+    def test_map_with_invalid_lookup(self):
+        # given:
+        json_mapper = JsonMapper({'donor_id': 'd1'})
+
+        # expect:
+        with self.assertRaises(UnreadableSpecification):
+            json_mapper.map({'donor': ['$lookup', 'donor_id', 'donors']})
+
+    def test_map_with_shared_literals(self):
+        # given:
+        json_object_list = json.loads('''{
+            "items": [{"name": "eggs"}, {"name": "milk"}]
+        }''')
+
+        # and:
+        spec = {
+            '$on': 'items',
+            'name': ['name'],
+            'metadata': json_object({'source': 'shop', 'tags': ['food']}),
+            'metadata.item': ['name'],
+            'sellers': json_array({'name': 'Peter Z'})
+        }
+
+        # when:
+        items = JsonMapper(json_object_list).map(spec)
+
+        # then:
+        self.assertEqual({'source': 'shop', 'tags': ['food'], 'item': 'eggs'}, items[0]['metadata'])
+        self.assertEqual({'source': 'shop', 'tags': ['food'], 'item': 'milk'}, items[1]['metadata'])
+        self.assertIs(items[0]['metadata']['tags'], items[1]['metadata']['tags'])
+        self.assertIs(items[0]['sellers'], items[1]['sellers'])
+        self.assertEqual({'source': 'shop', 'tags': ['food']}, spec['metadata'][1])
+
+    def test_map_with_field_set_inside_plain_literal(self):
+        # given:
+        json_object_list = json.loads('''{
+            "items": [{"id": 1}, {}]
+        }''')
+
+        # and:
+        spec = {
+            '$on': 'items',
+            'meta': ['$object', {'source': 'shop', 'details': {'kind': 'item'}}],
+            'meta.id': ['id'],
+            'meta.details.id': ['id']
+        }
+
+        # when:
+        items = JsonMapper(json_object_list).map(spec)
+
+        # then:
+        self.assertEqual({'source': 'shop', 'details': {'kind': 'item', 'id': 1}, 'id': 1}, items[0]['meta'])
+        self.assertEqual({'source': 'shop', 'details': {'kind': 'item'}}, items[1]['meta'])
+        self.assertEqual({'source': 'shop', 'details': {'kind': 'item'}}, spec['meta'][1])
@@ -0,0 +1,117 @@
+import time
+from unittest import TestCase
+
+from json_converter.converter import JsonConverter
+from json_converter.json_mapper import JsonMapper
+from json_converter.limits import MappingLimits, MappingLimitExceeded, MAX_ARRAY_LENGTH, MAX_DEPTH, MAX_NODES, \
+    MAX_SECONDS
+
+
+def slow_copy(*args):
+    time.sleep(0.01)
+    return args[0]
+
+
+class MappingLimitsTest(TestCase):
+
+    def setUp(self):
+        self.document = {
+            'catalogue': {
+                'books': [{'title': f'book {index}', 'price': index} for index in range(50)]
+            }
+        }
+        self.spec = {
+            '$on': 'catalogue',
+            'books': {
+                '$on': 'books',
+                'title': ['title'],
+                'price': ['price']
+            }
+        }
+
+    def _engines(self):
+        return [
+            ('mapper', lambda spec, limits: JsonMapper(self.document).map(spec, limits=limits)),
+            ('converter', lambda spec, limits: JsonConverter(spec).convert(self.document, limits=limits))
+        ]
+
+    def test_within_limits(self):
+        # given:
+        limits = MappingLimits(max_seconds=10, max_nodes=101, max_array_length=50, max_depth=2)
+
+        # expect:
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                self.assertEqual(JsonMapper(self.document).map(self.spec), engine(self.spec, limits))
+
+    def test_max_nodes(self):
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(MappingLimitExceeded) as context:
+                    engine(self.spec, MappingLimits(max_nodes=20))
+
+                # then:
+                self.assertEqual(MAX_NODES, context.exception.limit)
+                self.assertEqual(20, context.exception.nodes - 1)
+                self.assertEqual('catalogue.books', context.exception.anchor)
+
+    def test_anchor_after_nested_spec(self):
+        # given:
+        document = {'meta': {'v': 1, 'w': 2}}
+        spec = {
+            'a': {'$on': 'meta', 'v': ['v'], 'w': ['w']},
+            'b': ['meta.v'],
+            'c': ['meta.w']
+        }
+        engines = [
+            ('mapper', lambda limits: JsonMapper(document).map(spec, limits=limits)),
+            ('converter', lambda limits: JsonConverter(spec).convert(document, limits=limits))
+        ]
+
+        for name, engine in engines:
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(MappingLimitExceeded) as context:
+                    engine(MappingLimits(max_nodes=3))
+
+                # then:
+                self.assertEqual('', context.exception.anchor)
+                self.assertEqual(1, context.exception.depth)
+
+    def test_max_array_length(self):
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(MappingLimitExceeded) as context:
+                    engine(self.spec, MappingLimits(max_array_length=49))
+
+                # then:
+                self.assertEqual(MAX_ARRAY_LENGTH, context.exception.limit)
+                self.assertEqual(0, context.exception.nodes)
+
+    def test_max_depth(self):
+        # given:
+        spec = {'wrapper': ['$object', {'books': ['$array', [self.spec], True]}, True]}
+
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                # expect:
+                self.assertIsNotNone(engine(spec, MappingLimits(max_depth=4)))
+                with self.assertRaises(MappingLimitExceeded) as context:
+                    engine(spec, MappingLimits(max_depth=3))
+                self.assertEqual(MAX_DEPTH, context.exception.limit)
+
+    def test_max_seconds(self):
+        # given:
+        spec = {'$on': 'catalogue.books', 'title': ['title', slow_copy]}
+
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(MappingLimitExceeded) as context:
+                    engine(spec, MappingLimits(max_seconds=0.05))
+
+                # then:
+                self.assertEqual(MAX_SECONDS, context.exception.limit)
+                self.assertLess(context.exception.nodes, 50)
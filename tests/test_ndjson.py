@@ -0,0 +1,116 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from json_converter.ndjson import NdjsonReader, ReaderClosed, INDEX_SUFFIX
+
+
+class NdjsonReaderTest(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'records.ndjson')
+        records = [{'id': index, 'name': f'record {index}'} for index in range(10)]
+        with open(self.path, 'w') as ndjson_file:
+            for index, record in enumerate(records):
+                ndjson_file.write(json.dumps(record) + '\n')
+                if index == 4:
+                    ndjson_file.write('\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_random_access(self):
+        # given:
+        with NdjsonReader(self.path) as reader:
+            # expect:
+            self.assertEqual(10, len(reader))
+            self.assertEqual({'id': 0, 'name': 'record 0'}, reader.record(0))
+            self.assertEqual(5, reader.record(5)['id'])
+            self.assertEqual(9, reader.record(-1)['id'])
+            self.assertEqual([3, 4, 5], [record['id'] for record in reader.records(3, 6)])
+            self.assertEqual([8, 1], [record['id'] for record in reader.select([8, 1])])
+
+            # and:
+            with self.assertRaises(IndexError):
+                reader.record(10)
+
+    def test_map(self):
+        # given:
+        spec = {'label': ['name']}
+
+        # when:
+        with NdjsonReader(self.path) as reader:
+            ranged = list(reader.map(spec, start=7))
+            selected = list(reader.map(spec, positions=[2]))
+
+        # then:
+        self.assertEqual([{'label': 'record 7'}, {'label': 'record 8'}, {'label': 'record 9'}], ranged)
+        self.assertEqual([{'label': 'record 2'}], selected)
+
+    def test_partitions(self):
+        # given:
+        with NdjsonReader(self.path) as reader:
+            # when:
+            partitions = reader.partitions(3)
+
+            # then:
+            self.assertEqual([range(0, 4), range(4, 7), range(7, 10)], partitions)
+            self.assertEqual([range(index, index + 1) for index in range(10)], reader.partitions(20))
+
+    def test_index_is_persisted_and_refreshed(self):
+        # given:
+        index_path = self.path + INDEX_SUFFIX
+        with NdjsonReader(self.path):
+            pass
+        self.assertTrue(os.path.exists(index_path))
+
+        # when:
+        with open(self.path, 'a') as ndjson_file:
+            ndjson_file.write(json.dumps({'id': 10, 'name': 'record 10'}) + '\n')
+
+        # then:
+        with NdjsonReader(self.path) as reader:
+            self.assertEqual(11, len(reader))
+            self.assertEqual(10, reader.record(10)['id'])
+
+    def test_closed_reader(self):
+        # given:
+        reader = NdjsonReader(self.path)
+
+        # expect:
+        with self.assertRaises(ReaderClosed):
+            len(reader)
+
+    def test_empty_file(self):
+        # given:
+        empty_path = os.path.join(self.directory.name, 'empty.ndjson')
+        open(empty_path, 'w').close()
+
+        # expect:
+        with NdjsonReader(empty_path) as reader:
+            self.assertEqual(0, len(reader))
+            self.assertEqual([], list(reader.records()))
+            self.assertEqual([], reader.partitions(4))
+
+    def test_map_with_filter(self):
+        # given:
+        checked = []
+
+        def is_even(*args):
+            checked.append(args[0])
+            return args[0] % 2 == 0
+
+        # and:
+        spec = {'$filter': ['id', is_even], 'label': ['name']}
+
+        # when:
+        with NdjsonReader(self.path) as reader:
+            results = list(reader.map(spec, stop=4))
+            skipped = list(reader.map(spec, stop=4, skip_filtered=True))
+
+        # then:
+        self.assertEqual([{'label': 'record 0'}, {}, {'label': 'record 2'}, {}], results)
+        self.assertEqual([{'label': 'record 0'}, {'label': 'record 2'}], skipped)
+        self.assertEqual([0, 1, 2, 3] * 2, checked)
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from json_converter.converter import JsonConverter
+from json_converter.pipeline import convert_stream
+from json_converter.post_process import prefix_with
+
+
+class ConvertStreamTest(TestCase):
+
+    def test_convert_stream(self):
+        # given:
+        async def documents():
+            for index in range(50):
+                await asyncio.sleep(0)
+                yield {'id': index}
+
+        # and:
+        async def collect():
+            return [result async for result in convert_stream(documents(), {'key': ['id', prefix_with, 'doc-']})]
+
+        # when:
+        results = asyncio.run(collect())
+
+        # then:
+        self.assertEqual([{'key': f'doc-{index}'} for index in range(50)], results)
+
+    def test_bounded_in_flight(self):
+        # given:
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def slow_copy(*args):
+            with lock:
+                running.append(args[0])
+                peak.append(len(running))
+            time.sleep(0.005)
+            with lock:
+                running.remove(args[0])
+            return args[0]
+
+        # and:
+        read = []
+
+        def documents():
+            for index in range(40):
+                read.append(index)
+                yield {'id': index}
+
+        # and:
+        converter = JsonConverter({'id': ['id', slow_copy]})
+        consumed = []
+
+        async def consume(executor):
+            async for result in convert_stream(documents(), converter, executor=executor, max_in_flight=4):
+                # the source is never more than the allowed number of documents ahead of the consumer
+                self.assertLessEqual(len(read) - len(consumed), 4)
+                consumed.append(result['id'])
+                await asyncio.sleep(0.001)
+
+        # when:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            asyncio.run(consume(executor))
+
+        # then:
+        self.assertEqual(list(range(40)), consumed)
+        self.assertLessEqual(max(peak), 4)
+
+    def test_early_stop(self):
+        # given:
+        async def first_three():
+            results = []
+            async for result in convert_stream(({'id': index} for index in range(100)), {'id': ['id']}):
+                results.append(result)
+                if len(results) == 3:
+                    break
+            return results
+
+        # expect:
+        self.assertEqual([{'id': 0}, {'id': 1}, {'id': 2}], asyncio.run(first_three()))
+
+    def test_slow_source(self):
+        # given:
+        async def documents():
+            for index in range(3):
+                yield {'id': index}
+                await asyncio.sleep(0.2)
+
+        # and:
+        async def collect():
+            started = time.monotonic()
+            arrivals = []
+            async for result in convert_stream(documents(), {'id': ['id']}, max_in_flight=16):
+                arrivals.append((result['id'], time.monotonic() - started))
+            return arrivals, time.monotonic() - started
+
+        # when:
+        arrivals, elapsed = asyncio.run(collect())
+
+        # then:
+        self.assertEqual([0, 1, 2], [index for index, _ in arrivals])
+        # each result arrives while the source is still waiting before its next document
+        for index, arrival in arrivals:
+            self.assertLess(arrival, 0.2 * (index + 1))
+        self.assertGreaterEqual(elapsed, 0.6)
@@ -0,0 +1,82 @@
+from datetime import datetime
+from unittest import TestCase
+
+from json_converter.post_process import concatenate_list, default_to, format_date, is_pure, parse_date, prefix_with, \
+    pure, ISO_FORMAT
+
+
+class FormatDateTest(TestCase):
+
+    def test_date_part(self):
+        # expect:
+        self.assertEqual('2020-03-05', format_date('2020-03-05T10:15:00Z'))
+        self.assertEqual('2020-03-05', format_date('2020-03-05'))
+        self.assertIsNone(format_date(None))
+        self.assertIsNone(format_date(''))
+
+    def test_iso_input(self):
+        # expect:
+        self.assertEqual('05/03/2020', format_date('2020-03-05T10:15:00Z', '%d/%m/%Y'))
+        self.assertEqual('2020-03-05T10:15:00+00:00', format_date('2020-03-05T10:15:00Z', ISO_FORMAT))
+        self.assertEqual('2020-03-05T10:15:00.250000+01:00', format_date('2020-03-05T10:15:00.25+01:00', ISO_FORMAT))
+        self.assertEqual('2020-03-05', format_date('2020-03-05T23:59:59', '%Y-%m-%d'))
+        self.assertEqual('2020-03-05T10:15:00.123456-01:30',
+                         format_date('2020-03-05T10:15:00.1234567-0130', ISO_FORMAT))
+        self.assertEqual('2020-03-05T10:15:00.100000', format_date('2020-03-05 10:15:00,1', ISO_FORMAT))
+        self.assertEqual('2020-03-05T00:00:00', format_date('2020-03-05', ISO_FORMAT))
+
+    def test_input_format(self):
+        # given:
+        formats = [
+            ('05/03/2020', '%d/%m/%Y'),
+            ('5/3/20 7:05', '%d/%m/%y %H:%M'),
+            ('2020-03-05 10:15:00.123+0100', '%Y-%m-%d %H:%M:%S.%f%z'),
+            ('2020-03-05T10:15:00Z', '%Y-%m-%dT%H:%M:%S%z'),
+            ('Mar 05 2020', '%b %d %Y'),
+            ('100%/2020', '100%%/%Y')
+        ]
+
+        # expect:
+        for date, date_format in formats:
+            with self.subTest(date=date):
+                expected = datetime.strptime(date, date_format)
+                self.assertEqual(expected.isoformat(), format_date(date, ISO_FORMAT, date_format))
+
+    def test_invalid_date(self):
+        # expect:
+        with self.assertRaises(ValueError):
+            format_date('2020-13-05', ISO_FORMAT, '%Y-%m-%d')
+
+        # and:
+        with self.assertRaises(ValueError):
+            format_date('05.03.2020', ISO_FORMAT, '%d/%m/%Y')
+
+        # and:
+        with self.assertRaises(ValueError):
+            parse_date('not a date')
+
+    def test_output_format(self):
+        # given:
+        date = '2020-03-05T07:08:09.000123+01:00'
+        parsed = datetime.fromisoformat(date)
+
+        # expect:
+        for output_format in ['%d/%m/%Y', '%Y%m%d %H:%M:%S.%f', '{%Y}', '%A %d %B %Y', '100%% %Y']:
+            with self.subTest(output_format=output_format):
+                self.assertEqual(parsed.strftime(output_format), format_date(date, output_format))
+
+
+class PurePostProcessorTest(TestCase):
+
+    def test_pure(self):
+        # given:
+        def shout(*args):
+            return args[0].upper()
+
+        # expect:
+        for post_processor in [prefix_with, format_date, concatenate_list, default_to]:
+            with self.subTest(post_processor=post_processor.__name__):
+                self.assertTrue(is_pure(post_processor))
+        self.assertFalse(is_pure(shout))
+        self.assertIs(shout, pure(shout))
+        self.assertTrue(is_pure(shout))
@@ -0,0 +1,297 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from json_converter.converter import JsonConverter
+from json_converter.json_mapper import JsonMapper
+from json_converter.post_process import prefix_with
+from json_converter.schema import OutputSchemaViolation, SchemaViolation, UnsupportedSchema, compile_schema
+
+
+def adult(*args):
+    return args[0] >= 18
+
+
+def violations(schema, value):
+    found = []
+    compile_schema(schema).validate(value, found)
+    return [(violation.location, violation.message) for violation in found]
+
+
+SPEC = {
+    '$on': 'people',
+    'name': ['name'],
+    'age': ['age'],
+    'profile.id': ['id', prefix_with, 'person-'],
+    'profile.tags': ['tags'],
+    'metadata': ['$object', {'source': 'registry'}],
+    'attributes': ['$array', [
+        {'key': ['', prefix_with, 'name'], 'value': ['name']},
+        {'key': ['', prefix_with, 'age'], 'value': ['age']}
+    ], True],
+    'registry': ['$object', {
+        '$on': 'registry',
+        'name': ['name']
+    }, True]
+}
+
+SCHEMA = {
+    'type': 'array',
+    'minItems': 1,
+    'items': {
+        'type': 'object',
+        'required': ['name', 'profile', 'registry'],
+        'properties': {
+            'name': {'type': 'string', 'minLength': 2},
+            'age': {'type': 'integer', 'minimum': 0},
+            'profile': {
+                'type': 'object',
+                'required': ['id', 'tags'],
+                'properties': {
+                    'id': {'type': 'string', 'pattern': '^person-[0-9]+$'},
+                    'tags': {'type': 'array', 'items': {'enum': ['a', 'b']}, 'uniqueItems': True}
+                }
+            },
+            'metadata': {'type': 'object', 'additionalProperties': False, 'properties': {'source': {}}},
+            'attributes': {
+                'type': 'array',
+                'items': {'type': 'object', 'required': ['key', 'value'], 'properties': {'key': {'type': 'string'}}}
+            },
+            'registry': {
+                'type': 'object',
+                'required': ['name'],
+                'properties': {'name': {'const': 'registry'}}
+            }
+        }
+    }
+}
+
+
+class CompileSchemaTest(TestCase):
+
+    def test_types(self):
+        # expect:
+        self.assertEqual([], violations({'type': 'integer'}, 3))
+        self.assertEqual([], violations({'type': 'integer'}, 3.0))
+        self.assertEqual([], violations({'type': ['string', 'null']}, None))
+        self.assertEqual([('', "True is not of type 'integer'.")], violations({'type': 'integer'}, True))
+        self.assertEqual([('', "'3' is not of type ['number', 'null'].")],
+                         violations({'type': ['number', 'null']}, '3'))
+
+    def test_keywords(self):
+        # expect:
+        self.assertEqual([('', '3 is less than the minimum of 5.'), ('', '3 is not a multiple of 2.')],
+                         violations({'minimum': 5, 'multipleOf': 2}, 3))
+        self.assertEqual([('', "'ab' is shorter than 3 characters."), ('', "'ab' does not match '^x'.")],
+                         violations({'minLength': 3, 'pattern': '^x'}, 'ab'))
+        self.assertEqual([('', 'True is not one of [1].')], violations({'enum': [1]}, True))
+        self.assertEqual([('', 'Array has more than 1 items.'), ('', 'Array has non-unique items.')],
+                         violations({'maxItems': 1, 'uniqueItems': True}, [1, 1]))
+        self.assertEqual([('', "'b' is a required property."), ('c', "3 is not allowed here.")],
+                         violations({'required': ['a', 'b'], 'properties': {'a': {}}, 'additionalProperties': False},
+                                    {'a': 1, 'c': 3}))
+        self.assertEqual([('[1].a', "'x' is not of type 'integer'.")],
+                         violations({'items': {'properties': {'a': {'type': 'integer'}}}}, [{'a': 1}, {'a': 'x'}]))
+
+    def test_annotations_are_ignored(self):
+        # expect:
+        self.assertEqual([], violations({'title': 'Name', 'description': 'A name', 'format': 'email'}, 'name'))
+
+    def test_unsupported_schemas(self):
+        for schema in [{'$ref': '#/definitions/name'}, {'anyOf': [{}]}, {'type': 'date'}, {'items': [{}]}, 'string']:
+            with self.subTest(schema=schema), self.assertRaises(UnsupportedSchema):
+                compile_schema(schema)
+
+
+class OutputSchemaTest(TestCase):
+
+    def setUp(self):
+        self.document = {
+            'registry': {'name': 'registry'},
+            'people': [
+                {'id': 1, 'name': 'Juan', 'age': 30, 'tags': ['a']},
+                {'id': 2, 'name': 'Mary', 'age': 12, 'tags': ['b', 'a']}
+            ]
+        }
+
+    def _engines(self, schema):
+        return [
+            ('mapper', lambda: JsonMapper(self.document).map(SPEC, schema=schema)),
+            ('mapper with compiled schema', lambda: JsonMapper(self.document).map(SPEC, schema=compile_schema(schema))),
+            ('converter', lambda: JsonConverter(SPEC, schema=schema).convert(self.document)),
+            ('parallel converter', lambda: self._convert_parallel(schema))
+        ]
+
+    def _convert_parallel(self, schema):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return JsonConverter(SPEC, schema=schema).convert_parallel(self.document, executor, chunk_size=1)
+
+    def test_valid_output(self):
+        for name, engine in self._engines(SCHEMA):
+            with self.subTest(engine=name):
+                # expect:
+                self.assertEqual(JsonMapper(self.document).map(SPEC), engine())
+
+    def test_violations(self):
+        # given:
+        self.document['registry']['name'] = 'other'
+        self.document['people'].append({'id': 'x3', 'name': 'P', 'age': -1, 'tags': ['a', 'c', 'a']})
+        self.document['people'].append({'id': 4, 'age': 'unknown'})
+        expected = OutputSchemaViolation([], None)
+        expected.violations = violations(SCHEMA, JsonMapper(self.document).map(SPEC))
+
+        for name, engine in self._engines(SCHEMA):
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine()
+
+                # then:
+                error = context.exception
+                self.assertEqual(JsonMapper(self.document).map(SPEC), error.result)
+                found = [(violation.location, violation.message) for violation in error.violations]
+                self.assertCountEqual(expected.violations, found)
+                self.assertIn(('[2].profile.tags[1]', "'c' is not one of ['a', 'b']."), found)
+                self.assertIn(('[3]', "'name' is a required property."), found)
+                self.assertIn(('[3].registry.name', "'other' is not one of ['registry']."), found)
+
+    def test_invalid_literal(self):
+        # given:
+        schema = {'items': {'properties': {'metadata': {'properties': {'source': {'type': 'integer'}}}}}}
+
+        for name, engine in self._engines(schema):
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine()
+
+                # then:
+                self.assertEqual([
+                    SchemaViolation((0, 'metadata', 'source'), "'registry' is not of type 'integer'."),
+                    SchemaViolation((1, 'metadata', 'source'), "'registry' is not of type 'integer'.")
+                ], context.exception.violations)
+
+    def test_filtered_items_are_not_validated(self):
+        # given:
+        spec = {'$on': 'people', '$filter': ['age', adult], 'name': ['name']}
+        schema = {'items': {'required': ['name'], 'properties': {'name': {'enum': ['Juan']}}}}
+
+        # expect:
+        self.assertEqual([{'name': 'Juan'}], JsonConverter(spec, schema=schema).convert(self.document))
+        self.assertEqual([{'name': 'Juan'}], JsonMapper(self.document).map(spec, schema=schema))
+
+    def test_nested_spec(self):
+        # given:
+        spec = {
+            '$on': 'catalogue',
+            'name': ['name'],
+            'books': {
+                '$on': 'books',
+                'title': ['title'],
+                'details.pages': ['pages']
+            }
+        }
+        schema = {
+            'properties': {
+                'books': {
+                    'type': 'array',
+                    'items': {
+                        'required': ['title'],
+                        'properties': {'details': {'properties': {'pages': {'type': 'integer'}}, 'required': ['isbn']}}
+                    }
+                }
+            }
+        }
+        document = {'catalogue': {'name': 'books', 'books': [{'title': 'One', 'pages': 'many'}, {'pages': 10}]}}
+        expected = [
+            SchemaViolation(('books', 0, 'details', 'pages'), "'many' is not of type 'integer'."),
+            SchemaViolation(('books', 0, 'details'), "'isbn' is a required property."),
+            SchemaViolation(('books', 1, 'details'), "'isbn' is a required property."),
+            SchemaViolation(('books', 1), "'title' is a required property.")
+        ]
+
+        for name, engine in [('mapper', lambda: JsonMapper(document).map(spec, schema=schema)),
+                             ('converter', lambda: JsonConverter(spec, schema=schema).convert(document))]:
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine()
+
+                # then:
+                self.assertEqual(expected, context.exception.violations)
+
+    def test_array_schema_without_items(self):
+        # given:
+        schema = {'type': 'array', 'minItems': 1, 'maxItems': 1, 'uniqueItems': True}
+
+        for name, engine in self._engines(schema):
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine()
+
+                # then:
+                self.assertEqual([SchemaViolation((), 'Array has more than 1 items.')], context.exception.violations)
+
+    def test_nested_array_schema_without_items(self):
+        # given:
+        spec = {
+            '$on': 'catalogue',
+            'books': {'$on': 'books', 'title': ['title']},
+            'titles': ['$object', {'$on': 'catalogue.books', 'title': ['title']}, True]
+        }
+        schema = {
+            'type': 'object',
+            'properties': {
+                'books': {'type': 'array', 'maxItems': 5},
+                'titles': {'type': 'array', 'maxItems': 1}
+            }
+        }
+        document = {'catalogue': {'books': [{'title': 'One'}, {'title': 'Two'}]}}
+
+        for name, engine in [('mapper', lambda: JsonMapper(document).map(spec, schema=schema)),
+                             ('converter', lambda: JsonConverter(spec, schema=schema).convert(document))]:
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine()
+
+                # then:
+                self.assertEqual([SchemaViolation(('titles',), 'Array has more than 1 items.')],
+                                 context.exception.violations)
+                self.assertEqual(JsonMapper(document).map(spec), context.exception.result)
+
+    def test_missing_anchored_node(self):
+        # given:
+        spec = {'$on': 'shelves', 'name': ['name']}
+
+        for name, engine in [('mapper', lambda schema: JsonMapper(self.document).map(spec, schema=schema)),
+                             ('converter', lambda schema: JsonConverter(spec, schema=schema).convert(self.document))]:
+            with self.subTest(engine=name):
+                # when:
+                with self.assertRaises(OutputSchemaViolation) as context:
+                    engine({'type': 'array'})
+
+                # then:
+                self.assertEqual([SchemaViolation((), "None is not of type 'array'.")], context.exception.violations)
+                self.assertIsNone(context.exception.result)
+                self.assertIsNone(engine({'type': ['array', 'null']}))
+
+    def test_violation_messages(self):
+        # given:
+        found = [
+            SchemaViolation((), "None is not of type 'array'."),
+            SchemaViolation((0,), "'name' is a required property."),
+            SchemaViolation((2, 'profile', 'tags', 1), "'c' is not one of ['a', 'b'].")
+        ]
+
+        # when:
+        error = OutputSchemaViolation(found, None)
+
+        # then:
+        self.assertEqual([
+            "<root>: None is not of type 'array'.",
+            "[0]: 'name' is a required property.",
+            "[2].profile.tags[1]: 'c' is not one of ['a', 'b']."
+        ], [str(violation) for violation in found])
+        self.assertTrue(str(error).endswith("violation(s):\n<root>: None is not of type 'array'.\n[0]: 'name' is a "
+                                            "required property.\n[2].profile.tags[1]: 'c' is not one of ['a', 'b']."))
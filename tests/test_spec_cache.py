@@ -0,0 +1,235 @@
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from json_converter.converter import _SpecPlan
+from json_converter.json_mapper import JsonMapper
+from json_converter.post_process import default_to, prefix_with
+from json_converter.spec_cache import SpecCache, UncacheableSpecification, entry_version, spec_digest
+
+
+def is_adult(*args):
+    return args[0] >= 18
+
+
+SPEC = {
+    '$on': 'people[*]',
+    '$filter': ['age', is_adult],
+    'name': ['name', default_to, 'unknown'],
+    'profile.id': ['id', prefix_with, 'person-'],
+    'metadata': ['$object', {'source': 'registry'}]
+}
+
+DOCUMENT = {
+    'people': [
+        {'id': 1, 'name': 'Juan', 'age': 30},
+        {'id': 2, 'name': 'Mary', 'age': 12},
+        {'id': 3, 'age': 40}
+    ]
+}
+
+
+class SpecDigestTest(TestCase):
+
+    def test_same_spec(self):
+        # expect:
+        self.assertEqual(spec_digest(SPEC), spec_digest(dict(SPEC)))
+        self.assertEqual(64, len(spec_digest(SPEC)))
+
+    def test_different_specs(self):
+        # given:
+        digests = [
+            spec_digest(SPEC),
+            spec_digest(SPEC, on='registry'),
+            spec_digest(SPEC, intern=True),
+            spec_digest({**SPEC, 'name': ['name', default_to, 'none']}),
+            spec_digest({**SPEC, 'name': ['name', prefix_with, 'unknown']}),
+            spec_digest({'a': ['a', default_to, [1]]}),
+            spec_digest({'a': ['a', default_to, (1,)]}),
+            spec_digest({'a': ['a', default_to, 1]}),
+            spec_digest({'a': ['a', default_to, True]}),
+            spec_digest({'a': ['a', default_to, {1, 2}]}),
+            spec_digest({'a': ['a', default_to, frozenset({1, 2})]}),
+            spec_digest({'a': ['a', default_to, 1.0]}),
+            spec_digest({'a': ['a'], 'b': ['b']}),
+            spec_digest({'b': ['b'], 'a': ['a']})
+        ]
+
+        # expect:
+        self.assertEqual(len(digests), len(set(digests)))
+
+    def test_same_spec_in_other_processes(self):
+        # given:
+        script = ('from json_converter.post_process import default_to\n'
+                  'from json_converter.spec_cache import spec_digest\n'
+                  "tags = {f'tag-{index}' for index in range(20)}\n"
+                  "print(spec_digest({'tags': ['tags', default_to, tags, frozenset(tags)]}))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        # when:
+        digests = set()
+        for seed in ['1', '2', '3']:
+            environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=root)
+            digests.add(subprocess.check_output([sys.executable, '-c', script], env=environment).strip())
+
+        # then:
+        self.assertEqual(1, len(digests))
+
+    def test_uncacheable_specs(self):
+        # given:
+        def local_function(*args):
+            return args[0]
+
+        # expect:
+        for spec in [{'a': ['a', lambda value: value]}, {'a': ['a', local_function]}]:
+            with self.subTest(spec=spec), self.assertRaises(UncacheableSpecification):
+                spec_digest(spec)
+
+
+class SpecCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SpecCache(os.path.join(self.directory.name, 'specs'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_converter(self):
+        # when:
+        first = self.cache.converter(SPEC)
+        second = SpecCache(self.cache.directory).converter(SPEC)
+
+        # then:
+        self.assertEqual(1, self.cache.misses)
+        self.assertTrue(os.path.exists(self.cache.path(spec_digest(SPEC))))
+        expected = JsonMapper(DOCUMENT).map(SPEC)
+        self.assertEqual(expected, first.convert(DOCUMENT))
+        self.assertEqual(expected, second.convert(DOCUMENT))
+        self.assertIsNot(first, second)
+
+    def test_hits_and_misses(self):
+        # when:
+        self.cache.converter(SPEC)
+        self.cache.converter(SPEC)
+        self.cache.converter(SPEC, on='registry')
+
+        # then:
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+        self.assertEqual(2, len(os.listdir(self.cache.directory)))
+
+    def test_uncacheable_spec(self):
+        # given:
+        spec = {'$on': 'people', 'name': ['name', lambda *args: args[0].upper()]}
+
+        # when:
+        converter = self.cache.converter(spec)
+
+        # then:
+        self.assertEqual([{'name': 'JUAN'}, {'name': 'MARY'}], converter.convert({'people': [
+            {'name': 'Juan'}, {'name': 'Mary'}
+        ]}))
+        self.assertFalse(os.path.exists(self.cache.directory))
+
+    def test_unreadable_cache_file(self):
+        # given:
+        self.cache.converter(SPEC)
+        with open(self.cache.path(spec_digest(SPEC)), 'wb') as cache_file:
+            cache_file.write(b'not a pickle')
+
+        # when:
+        converter = self.cache.converter(SPEC)
+
+        # then:
+        self.assertEqual(2, self.cache.misses)
+        self.assertEqual(JsonMapper(DOCUMENT).map(SPEC), converter.convert(DOCUMENT))
+        cache = SpecCache(self.cache.directory)
+        cache.converter(SPEC)
+        self.assertEqual(1, cache.hits)
+
+    def test_entry_of_another_version(self):
+        # given:
+        path = self.cache.path(spec_digest(SPEC))
+        self.cache.converter(SPEC)
+        with open(path, 'rb') as cache_file:
+            pickle.load(cache_file)
+            converter = pickle.load(cache_file)
+        # an entry without a version, as written before entries had one
+        with open(path, 'wb') as cache_file:
+            pickle.dump(converter, cache_file)
+
+        # when:
+        cache = SpecCache(self.cache.directory)
+        cache.converter(SPEC)
+
+        # then:
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        with open(path, 'rb') as cache_file:
+            self.assertEqual(entry_version(), pickle.load(cache_file))
+
+    def test_entry_of_another_plan_format(self):
+        # given:
+        self.cache.converter(SPEC)
+
+        # when:
+        with patch('json_converter.converter.PLAN_FORMAT', -1):
+            cache = SpecCache(self.cache.directory)
+            converter = cache.converter(SPEC)
+
+        # then:
+        self.assertNotEqual(entry_version(), cache.version)
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        self.assertEqual(JsonMapper(DOCUMENT).map(SPEC), converter.convert(DOCUMENT))
+
+    def test_entry_of_another_plan_layout(self):
+        # given:
+        schema_slots = ('check', 'node_check', 'field_checks', 'parent_checks', 'expression_paths', 'items_plan')
+        layout = tuple(slot for slot in _SpecPlan.__slots__ if slot not in schema_slots)
+
+        # when:
+        with patch.object(_SpecPlan, '__slots__', layout):
+            older_version = entry_version()
+
+        # then:
+        self.assertNotEqual(entry_version(), older_version)
+
+    def test_unsupported_pickle_protocol(self):
+        # given:
+        self.cache.converter(SPEC)
+        with open(self.cache.path(spec_digest(SPEC)), 'wb') as cache_file:
+            cache_file.write(b'\x80\x63')
+
+        # when:
+        self.cache.converter(SPEC)
+
+        # then:
+        self.assertEqual(2, self.cache.misses)
+
+    def test_unwritable_directory(self):
+        # given:
+        blocking_file = os.path.join(self.directory.name, 'file')
+        with open(blocking_file, 'w') as file:
+            file.write('not a directory')
+        cache = SpecCache(os.path.join(blocking_file, 'specs'))
+
+        # when:
+        converter = cache.converter(SPEC)
+
+        # then:
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(JsonMapper(DOCUMENT).map(SPEC), converter.convert(DOCUMENT))
+
+    def test_clear(self):
+        # given:
+        self.cache.converter(SPEC)
+
+        # when:
+        self.cache.clear()
+
+        # then:
+        self.assertEqual([], os.listdir(self.cache.directory))
@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from json_converter.converter import JsonConverter
+from json_converter.json_mapper import JsonMapper
+from json_converter.tracing import Tracer, traced, ANCHOR_SPAN, APPLY_SPAN, MAP_SPAN, POST_PROCESS_SPAN
+
+
+def shout(*args):
+    return args[0].upper()
+
+
+class TracerTest(TestCase):
+
+    def setUp(self):
+        self.document = {
+            'catalogue': {
+                'name': 'books',
+                'books': [{'title': 'one'}, {'title': 'two'}]
+            }
+        }
+        self.spec = {
+            '$on': 'catalogue',
+            'name': ['name', shout],
+            'books': {
+                '$on': 'books',
+                'title': ['title', shout]
+            }
+        }
+
+    def _engines(self):
+        return [
+            ('mapper', lambda tracer: JsonMapper(self.document).map(self.spec, tracer=tracer)),
+            ('converter', lambda tracer: JsonConverter(self.spec).convert(self.document, tracer=tracer))
+        ]
+
+    def test_spans(self):
+        for name, engine in self._engines():
+            with self.subTest(engine=name):
+                # given:
+                tracer = Tracer()
+
+                # when:
+                result = engine(tracer)
+
+                # then:
+                self.assertEqual(JsonMapper(self.document).map(self.spec), result)
+                stacks = {tuple(span.stack) for span in tracer.spans}
+                self.assertIn(('map [catalogue]', 'anchor [catalogue]'), stacks)
+                self.assertIn(('map [catalogue]', 'apply [catalogue]', 'post_process [shout]'), stacks)
+                self.assertIn(('map [catalogue]', 'apply [catalogue]', 'map [catalogue.books]',
+                               'apply [catalogue.books]', 'post_process [shout]'), stacks)
+                names = [span.name for span in tracer.spans]
+                self.assertEqual(2, names.count(MAP_SPAN))
+                self.assertEqual(2, names.count(ANCHOR_SPAN))
+                self.assertEqual(3, names.count(APPLY_SPAN))
+                self.assertEqual(3, names.count(POST_PROCESS_SPAN))
+
+    def test_literal_item_spans(self):
+        # given:
+        document = {'a': {'x': 1, 'meta': {'y': 2}}}
+        spec = {
+            '$on': 'a',
+            'arr': ['$array', [{'p': ['x']}, {'q': ['x']}], True],
+            'obj': ['$object', {'$on': 'a.meta', 'r': ['y']}, True]
+        }
+        engines = [
+            ('mapper', lambda tracer: JsonMapper(document).map(spec, tracer=tracer)),
+            ('converter', lambda tracer: JsonConverter(spec).convert(document, tracer=tracer))
+        ]
+
+        for name, engine in engines:
+            with self.subTest(engine=name):
+                # given:
+                tracer = Tracer()
+
+                # when:
+                engine(tracer)
+
+                # then:
+                stacks = set(tracer.folded_stacks())
+                self.assertIn('map [a];apply [a];map [arr[0]];apply [arr[0]]', stacks)
+                self.assertIn('map [a];apply [a];map [arr[1]];apply [arr[1]]', stacks)
+                self.assertIn('map [a];apply [a];map [obj on a.meta];apply [obj on a.meta]', stacks)
+
+    def test_span_times(self):
+        # given:
+        tracer = Tracer()
+
+        # when:
+        JsonConverter(self.spec).convert(self.document, tracer=tracer)
+
+        # then:
+        root = next(span for span in tracer.spans if span.parent is None)
+        children = [span for span in tracer.spans if span.parent is root]
+        self.assertEqual('map', root.name)
+        self.assertAlmostEqual(root.duration, root.self_time + sum(span.duration for span in children))
+        for span in tracer.spans:
+            self.assertGreaterEqual(span.self_time, -1e-9)
+            if span.parent is not None:
+                self.assertLessEqual(span.parent.start, span.start)
+                self.assertLessEqual(span.end, span.parent.end)
+
+    def test_write_chrome_trace(self):
+        # given:
+        tracer = Tracer()
+        JsonMapper(self.document).map(self.spec, tracer=tracer)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+
+            # when:
+            tracer.write_chrome_trace(path)
+
+            # then:
+            with open(path) as trace_file:
+                trace = json.load(trace_file)
+        events = trace['traceEvents']
+        self.assertEqual(len(tracer.spans), len(events))
+        self.assertEqual('map [catalogue]', events[0]['name'])
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+        self.assertEqual(['post_process', 'post_process', 'post_process'],
+                         [event['cat'] for event in events if event['cat'] == POST_PROCESS_SPAN])
+        self.assertEqual({'detail': 'shout'}, events[-1]['args'])
+
+    def test_write_folded_stacks(self):
+        # given:
+        tracer = Tracer()
+        JsonConverter(self.spec).convert(self.document, tracer=tracer)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.folded')
+
+            # when:
+            tracer.write_folded_stacks(path)
+
+            # then:
+            with open(path) as stacks_file:
+                lines = stacks_file.read().splitlines()
+        stacks = dict(line.rsplit(' ', 1) for line in lines)
+        self.assertEqual(len(set(';'.join(span.stack) for span in tracer.spans)), len(stacks))
+        self.assertIn('map [catalogue];apply [catalogue];map [catalogue.books];apply [catalogue.books];'
+                      'post_process [shout]', stacks)
+        self.assertTrue(all(value.isdigit() for value in stacks.values()))
+
+    def test_spans_per_thread(self):
+        # given:
+        tracer = Tracer()
+        converter = JsonConverter(self.spec)
+        threads = [threading.Thread(target=converter.convert, args=(self.document,), kwargs={'tracer': tracer})
+                   for _ in range(4)]
+
+        # when:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # then:
+        roots = [span for span in tracer.spans if span.parent is None]
+        self.assertEqual(4, len(roots))
+        for span in tracer.spans:
+            if span.parent is not None:
+                self.assertEqual(span.parent.thread, span.thread)
+
+    def test_traced_without_tracer(self):
+        # expect:
+        self.assertEqual('ONE', traced(None, POST_PROCESS_SPAN, 'shout', shout, 'one'))
+
+    def test_untraced_mapping_skips_traced(self):
+        for name, run in self._engines():
+            with self.subTest(engine=name):
+                # given:
+                with patch('json_converter.json_mapper.traced') as mapper_traced, \
+                        patch('json_converter.converter.traced') as converter_traced:
+                    # when:
+                    result = run(None)
+
+                # then:
+                self.assertEqual({'name': 'BOOKS', 'books': [{'title': 'ONE'}, {'title': 'TWO'}]}, result)
+                mapper_traced.assert_not_called()
+                converter_traced.assert_not_called()